@@ -1,81 +1,237 @@
 import sys
 import os
+import time
+STARTED_AT = time.perf_counter()
+PROFILE_FLAG = "--profile-startup"   # 输出启动各阶段耗时，不作为 CLI 子命令处理
+PROFILE_STARTUP = PROFILE_FLAG in sys.argv
+if PROFILE_STARTUP: sys.argv.remove(PROFILE_FLAG)
+if __name__ == '__main__' and len(sys.argv) > 1:
+    # 带子命令时走无界面 CLI / 守护进程，不加载 PyQt5 与 requests
+    from openlist_cli import main
+    sys.exit(main(sys.argv[1:]))
 import subprocess
-import socket
-import psutil
 import ctypes
-import time
-import requests
 import shutil
-import zipfile
 import webbrowser
 import re
 import json
+import threading
+import functools
+from collections import deque
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QPushButton, QLabel, QTextEdit, QFrame, QFileDialog, 
-                             QLineEdit, QMessageBox, QSizePolicy, QSystemTrayIcon, QMenu, QAction, QInputDialog)
-from PyQt5.QtCore import QTimer, Qt, QThread, pyqtSignal, QRect, QPoint, QSize
-from PyQt5.QtGui import QFont, QColor, QPixmap, QImage, QPainter, QPainterPath, QIcon, QPen, QCursor
-
-# --- 核心配置 ---
-CONFIG_FILE = ".openlist_path"
+                             QPushButton, QLabel, QPlainTextEdit, QFrame, QFileDialog, 
+                             QLineEdit, QComboBox, QMessageBox, QSizePolicy, QSystemTrayIcon, QMenu, QAction, QInputDialog)
+from PyQt5.QtCore import QTimer, Qt, QThread, QObject, pyqtSignal, pyqtSlot, QRect, QPoint, QSize
+from PyQt5.QtGui import QTextCursor, QFont, QColor, QPixmap, QImage, QPainter, QPainterPath, QIcon, QPen, QCursor
+from openlist_core import *  # 无界面核心：监管 / 探测 / 采样 / 备份恢复 / 凭证
+PROFILE = StartupProfile(STARTED_AT); PROFILE.mark("imports")
+
+# --- 界面配置 ---
 GEOMETRY_FILE = ".openlist_geo"
-DEFAULT_PORT = 5244
 BILIBILI_UID = "3493268808620216"
+AVATAR_API_URL = f"https://api.bilibili.com/x/space/wbi/acc/info?mid={BILIBILI_UID}"
+AVATAR_FALLBACK_URL = "https://i0.hdslb.com/bfs/face/e4eed8017871c0117b725ace44529f184fbb641f.webp"
+AVATAR_HEADERS = {'Referer': 'https://www.bilibili.com/'}
+AVATAR_API_TTL = 86400   # 头像地址缓存 1 天，图片本身按 ASSET_TTL
 GITHUB_URL = "https://github.com/guguli685-boop/OpenList-Companion/tree/main"
 HELP_DOC_URL = "https://gemini.google.com/app/6a8d06b29e498881"
 AUTHOR_DISPLAY_NAME = "余宣灵."
+LOG_FLUSH_MS = 100       # 日志批量刷新间隔
+SPARK_WIDTH = 24         # 状态面板迷你走势图的样本数
+STATE_ICONS = {"running": "🟢", "degraded": "🟠", "stopped": "🔴"}
+STORAGE_ROWS = 8         # 存储面板最多显示的行数，按错误率 / p95 排序，最差的在前
+LOG_FILTERS = (("全部级别", 0), ("信息及以上", 2), ("警告及以上", 3), ("仅错误", 4))  # (显示名, 最低 LEVEL_RANK)
+LOG_EVENT_ALERTS = {"port_in_use": "端口被占用", "storage_failed": "存储加载失败", "db_locked": "数据库被锁定", "panic": "服务崩溃"}
 
 # --- 路径感应 ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ICON_APP = os.path.join(BASE_DIR, "openlist.png")
 ICON_RUNNING = os.path.join(BASE_DIR, "正在运行图标-01.png")
 ICON_STOPPED = os.path.join(BASE_DIR, "停止运行图标-01.png")
 
-def hide_file(path):
-    try:
-        if os.path.exists(path):
-            ctypes.windll.kernel32.SetFileAttributesW(path, 2)
-    except: pass
+class Dispatcher(QObject):
+    # 核心层的回调来自后台线程，经此信号排队回到 GUI 线程执行
+    call = pyqtSignal(object)
+    def __init__(self): super().__init__(); self.call.connect(self._run)
+    @pyqtSlot(object)
+    def _run(self, fn): fn()
+    def post(self, fn, *args): self.call.emit(functools.partial(fn, *args))
+
+class RestoreThread(QThread):
+    progress = pyqtSignal(int)
+    staged = pyqtSignal(str)
+    failed = pyqtSignal(str)
+    def __init__(self, source, staging): super().__init__(); self.source, self.staging = source, staging; self._pct = -1
+    def report(self, done, total):
+        pct = int(done * 100 / total) if total else 100
+        if pct != self._pct: self._pct = pct; self.progress.emit(pct)
+    def run(self):
+        try: stage_restore(self.source, self.staging, self.report); self.staged.emit(self.staging)
+        except Exception as e:
+            shutil.rmtree(self.staging, ignore_errors=True); self.failed.emit(str(e))
+
+class BackupThread(QThread):
+    progress = pyqtSignal(int)
+    done = pyqtSignal(str)
+    def __init__(self, data_dir, repo): super().__init__(); self.engine = BackupEngine(data_dir, repo); self._pct = -1
+    def report(self, done, total):
+        pct = int(done * 100 / total) if total else 100
+        if pct != self._pct: self._pct = pct; self.progress.emit(pct)
+    def run(self):
+        start = time.perf_counter()
+        try:
+            name, count, removed = self.engine.run(self.report)
+            self.done.emit(f"✅ 备份完成 {name[:-5]}: {count} 个文件，新增 {self.engine.written} 块，清理 {removed} 块，用时 {time.perf_counter() - start:.1f}s")
+        except Exception as e: self.done.emit(f"❌ 备份失败: {e}")
+
+class TaskThread(QThread):
+    # 把一次性的阻塞调用挪出 GUI 线程，异常时结果为 None
+    done = pyqtSignal(object)
+    def __init__(self, fn): super().__init__(); self.fn = fn
+    def run(self):
+        try: result = self.fn()
+        except Exception: result = None
+        self.done.emit(result)
 
 class AvatarDownloader(QThread):
-    finished = pyqtSignal(QPixmap)
+    # 先用磁盘缓存立即出图，缓存过期才联网条件请求；QPixmap 只能在主线程创建，这里只传 QImage
+    finished = pyqtSignal(QImage)
+    def resolve(self, cache, offline):
+        try: face_url = json.loads(cache.fetch(AVATAR_API_URL, AVATAR_API_TTL, AVATAR_HEADERS, offline)).get("data", {}).get("face") or AVATAR_FALLBACK_URL
+        except: face_url = AVATAR_FALLBACK_URL
+        return cache.fetch(face_url, ASSET_TTL, AVATAR_HEADERS, offline)
+    def emit_image(self, data):
+        image = QImage.fromData(data) if data else QImage()
+        if not image.isNull(): self.finished.emit(image)
     def run(self):
-        try:
-            api_url = f"https://api.bilibili.com/x/space/wbi/acc/info?mid={BILIBILI_UID}"
-            headers = {'User-Agent': 'Mozilla/5.0', 'Referer': 'https://www.bilibili.com/'}
-            resp = requests.get(api_url, headers=headers, timeout=5).json()
-            face_url = resp.get("data", {}).get("face", "https://i0.hdslb.com/bfs/face/e4eed8017871c0117b725ace44529f184fbb641f.webp")
-            img_data = requests.get(face_url, headers=headers, timeout=5).content
-            image = QImage.fromData(img_data)
-            if not image.isNull(): self.finished.emit(QPixmap.fromImage(image))
-        except: pass
+        cache = AssetCache(); shown = self.resolve(cache, offline=True); self.emit_image(shown)
+        data = self.resolve(cache, offline=False)
+        if data != shown: self.emit_image(data)
 
 class OpenListManager(QWidget):
     def __init__(self):
         super().__init__()
         self.setAttribute(Qt.WA_StaticContents) 
-        self.app_path = self.auto_find_path() 
-        self.raw_username = "admin"
-        self.raw_password = ""
-        self.initUI()
-        self.load_geometry()
-        self.initTray() 
-        self.load_author_info()
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.refresh_status)
-        self.timer.start(1000)
-
-    def auto_find_path(self):
-        local_alist = os.path.join(BASE_DIR, "alist.exe")
-        if os.path.exists(local_alist): return os.path.normpath(local_alist)
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                    p = f.read().strip().replace('"', '')
-                    if os.path.isfile(p): return os.path.normpath(p)
-            except: pass
-        return ""
+        self.instances = []; self.current = None; self.board_rows = {}; self.log_min_rank = 0; self.history_thread = None
+        self.cred_thread = None
+        self.backup_repo = load_backup_repo(); self.backup_thread = None; self.backup_queue = deque()
+        self.restore_thread = None; self.restore_inst = None; self.restore_rollback = None; self.restore_token = 0; self.restore_down_at = 0.0; self.verify_thread = None
+        self.dispatcher = Dispatcher()
+        self.prober = ProbeScheduler(self.dispatcher.post); self.prober.on_state = self.on_probe_state; self.prober.on_latency = self.on_probe_latency
+        self.sampler = MetricsSampler(self.dispatcher.post); self.sampler.on_sampled = self.refresh_metrics; self.metrics_server = None
+        self.storage_prober = StorageProber(self.dispatcher.post); self.storage_prober.on_stats = self.on_storage_stats; self.storage_stats = {}
+        self.initUI(); PROFILE.mark("ui")
+        self.load_geometry(); PROFILE.mark("geometry")
+        self.initTray(); PROFILE.mark("tray")
+        for inst in load_instances(self.dispatcher.post): self.add_instance_entry(inst)
+        self.rebuild_board(); self.switch_instance(0); self.prober.start(); self.sampler.start(); self.storage_prober.start(); PROFILE.mark("instances")
+        QTimer.singleShot(0, self.load_author_info)  # 头像不占用首帧之前的时间
+        if METRICS_PORT:
+            try: self.metrics_server = serve_metrics(self.sampler)
+            except OSError as e: self.log(f"❌ 指标端口 {METRICS_PORT} 启动失败: {e}")
+        self.log_timer = QTimer()
+        self.log_timer.timeout.connect(self.flush_logs)
+        self.log_timer.start(LOG_FLUSH_MS)
+        self.backup_timer = QTimer()
+        self.backup_timer.timeout.connect(lambda: self.backup_repo and self.queue_backup(self.instances))
+        if AUTO_BACKUP_INTERVAL: self.backup_timer.start(AUTO_BACKUP_INTERVAL * 1000)
+
+    @property
+    def app_path(self): return self.current.path if self.current else ""
+
+    # --- 实例注册表 ---
+    def add_instance_entry(self, inst):
+        self.instances.append(inst)
+        inst.supervisor.on_ready = lambda secs, inst=inst: self.on_ready(inst, secs); inst.follow_log()
+        self.prober.set_targets({i.name: i.port for i in self.instances}); self.sampler.set_targets({i.name: i.supervisor for i in self.instances}); self.storage_prober.set_targets(self.instances)
+
+    def instance_named(self, name): return next((i for i in self.instances if i.name == name), None)
+
+    def add_instance(self):
+        p, _ = QFileDialog.getOpenFileName(self, "添加 alist 实例", "", "EXE (*.exe)")
+        if not p: return
+        p = os.path.normpath(p); base = os.path.basename(os.path.dirname(p)) or "alist"
+        port, ok = QInputDialog.getInt(self, "实例端口", "该实例的 HTTP 端口:", read_port(os.path.join(os.path.dirname(p), "data")) or DEFAULT_PORT, 1, 65535)
+        if not ok: return
+        name, n = base, 2
+        while self.instance_named(name): name = f"{base}-{n}"; n += 1
+        self.add_instance_entry(Instance(name, p, port, self.dispatcher.post)); save_instances(self.instances)
+        self.rebuild_board(); self.cmb_instance.setCurrentIndex(len(self.instances) - 1); self.log(f"➕ 已添加实例 {name} (:{port})")
+
+    def remove_instance(self):
+        inst = self.current
+        if len(self.instances) <= 1 or inst is self.restore_inst: return
+        if QMessageBox.question(self, "移除实例", f"从面板移除实例 {inst.name}？(如由本程序拉起将一并停止)") != QMessageBox.Yes: return
+        if inst.supervisor.is_running(): inst.supervisor.stop()
+        inst.unfollow_log(); self.instances.remove(inst); save_instances(self.instances)
+        self.prober.set_targets({i.name: i.port for i in self.instances}); self.sampler.set_targets({i.name: i.supervisor for i in self.instances}); self.storage_prober.set_targets(self.instances)
+        self.rebuild_board(); self.switch_instance(0)
+
+    def rebuild_board(self):
+        self.cmb_instance.blockSignals(True); self.cmb_instance.clear()
+        for row in self.board_rows.values(): self.board_layout.removeWidget(row); row.deleteLater()
+        self.board_rows = {}
+        for inst in self.instances:
+            self.cmb_instance.addItem(f"{inst.name}  :{inst.port}")
+            row = QLabel(); row.setStyleSheet("color: #495057; border: none; font-size: 11px;")
+            self.board_layout.addWidget(row); self.board_rows[inst.name] = row; self.update_board_row(inst)
+        if self.current in self.instances: self.cmb_instance.setCurrentIndex(self.instances.index(self.current))
+        self.cmb_instance.blockSignals(False)
+
+    def update_board_row(self, inst):
+        row = self.board_rows.get(inst.name)
+        if row: row.setText(f"{STATE_ICONS[inst.state]} {inst.name} :{inst.port}   {inst.latency[2:]}")
+
+    def switch_instance(self, index):
+        if not 0 <= index < len(self.instances): return
+        inst = self.current = self.instances[index]
+        self.lbl_address.setText(f"💻 http://127.0.0.1:{inst.port}"); self.lbl_latency.setText(inst.latency)
+        self.refresh_status(inst.state); self.update_cred_labels(inst); self.refresh_metrics(); self.refresh_storages(); self.tips_bar.hide()
+        self.render_logs()
+
+    def render_logs(self):
+        rank = self.log_min_rank; self.btn_errors.setChecked(False)
+        self.log_box.setPlainText("\n".join(str(r) for r in self.current.log_buffer.lines if LEVEL_RANK[r.level] >= rank)); self.log_box.moveCursor(QTextCursor.End)
+
+    def set_log_filter(self, index):
+        self.log_min_rank = LOG_FILTERS[index][1]
+        if self.current: self.render_logs()
+
+    def on_probe_state(self, name, state):
+        inst = self.instance_named(name)
+        if not inst: return
+        inst.state = state; self.update_board_row(inst)
+        if state == "running": inst.supervisor.mark_ready(); self.storage_prober.poke()
+        if inst is self.current: self.refresh_status(state)
+
+    def on_probe_latency(self, name, summary):
+        inst = self.instance_named(name)
+        if not inst: return
+        inst.latency = summary; self.update_board_row(inst)
+        if inst is self.current: self.lbl_latency.setText(summary)
+
+    def refresh_metrics(self):
+        series = self.sampler.series.get(self.current.name) if self.current else None
+        if not series: return
+        lines = [f"{label} {sparkline(series[key].tail(SPARK_WIDTH)):<{SPARK_WIDTH}} {format_metric(key, series[key].last())}" for key, label, *_ in METRICS]
+        self.lbl_metrics.setText("\n".join(lines)); self.lbl_overhead.setText(f"采样开销 {self.sampler.overhead():.2f}% 单核")
+
+    def on_storage_stats(self, name, rows):
+        self.storage_stats[name] = rows
+        if self.current and self.current.name == name: self.refresh_storages()
+
+    def refresh_storages(self):
+        rows = self.storage_stats.get(self.current.name, []) if self.current else []
+        if rows is None: self.lbl_storages.setText("需要管理员凭证：点击「🔍 获取」或在初次启动时抓取初始密码后自动开始"); return
+        if not rows: self.lbl_storages.setText("服务运行后自动探测已挂载的存储..."); return
+        worst = sorted(rows, key=lambda r: (r["error_rate"], r["p95"] or float("inf") if r["samples"] else 0), reverse=True)
+        icon = lambda r: "🔴" if r["last_error"] or r["error_rate"] >= 0.5 else ("🟠" if r["error_rate"] else "🟢")
+        lines = [f"{icon(r)} {r['mount'][:18]:<18} {r['summary']} · 错误 {r['error_rate']:.0%}" for r in worst[:STORAGE_ROWS]]
+        if len(rows) > STORAGE_ROWS: lines.append(f"… 另有 {len(rows) - STORAGE_ROWS} 个存储")
+        self.lbl_storages.setText("\n".join(lines))
+        self.lbl_storages.setToolTip("\n".join(f"{r['mount']} [{r['driver']}]: {r['last_error']}" for r in worst if r["last_error"]))
+
+    def on_ready(self, inst, secs):
+        self.log(f"✅ 服务已就绪 ({secs:.1f}s)", inst); self.on_restore_ready(inst)
 
     def load_geometry(self):
         if os.path.exists(GEOMETRY_FILE):
@@ -93,13 +249,20 @@ class OpenListManager(QWidget):
             hide_file(GEOMETRY_FILE)
         except: pass
 
+    def on_first_frame(self, report):
+        PROFILE.mark("first_frame")
+        if not report: return
+        for line in PROFILE.report():
+            self.log(line)
+            if sys.stderr: print(line, file=sys.stderr)
+
     def load_author_info(self):
         self.downloader = AvatarDownloader()
         self.downloader.finished.connect(self.update_avatar_with_mask)
         self.downloader.start()
 
-    def update_avatar_with_mask(self, pixmap):
-        size = 64
+    def update_avatar_with_mask(self, image):
+        size, pixmap = 64, QPixmap.fromImage(image)
         target = QPixmap(size, size); target.fill(Qt.transparent)
         painter = QPainter(target); painter.setRenderHint(QPainter.Antialiasing)
         path = QPainterPath(); path.addEllipse(0, 0, size, size)
@@ -138,12 +301,32 @@ class OpenListManager(QWidget):
         self.lbl_avatar = QLabel(); self.lbl_avatar.setFixedSize(64, 64); self.lbl_avatar.setStyleSheet("background-color: #F1F3F5; border-radius: 32px;")
         self.lbl_title = QLabel(AUTHOR_DISPLAY_NAME); self.lbl_title.setFont(QFont("Microsoft YaHei UI", 18, QFont.Bold))
         profile_hbox.addWidget(self.lbl_avatar); profile_hbox.addSpacing(15); profile_hbox.addWidget(self.lbl_title); side_layout.addLayout(profile_hbox)
+
+        self.inst_box = QFrame(); self.inst_box.setStyleSheet("background-color: #F8F9FA; border-radius: 15px; border: none;")
+        inst_layout = QVBoxLayout(self.inst_box); inst_header = QHBoxLayout(); inst_header.addWidget(QLabel("🗂 实例看板", font=QFont("Microsoft YaHei UI", 10, QFont.Bold)))
+        self.btn_add_inst = self.create_mini_btn("＋ 添加", "#4C6EF5"); self.btn_add_inst.clicked.connect(self.add_instance)
+        self.btn_del_inst = self.create_mini_btn("－ 移除", "#ADB5BD"); self.btn_del_inst.clicked.connect(self.remove_instance)
+        inst_header.addStretch(); inst_header.addWidget(self.btn_add_inst); inst_header.addWidget(self.btn_del_inst); inst_layout.addLayout(inst_header)
+        self.cmb_instance = QComboBox(); self.cmb_instance.setStyleSheet("background: white; border-radius: 6px; padding: 3px;"); self.cmb_instance.currentIndexChanged.connect(self.switch_instance)
+        self.board_layout = QVBoxLayout(); self.board_layout.setSpacing(2); inst_layout.addWidget(self.cmb_instance); inst_layout.addLayout(self.board_layout); side_layout.addWidget(self.inst_box)
         
-        self.status_box = QFrame(); self.status_box.setFixedHeight(100); self.status_box.setStyleSheet("background-color: #F8F9FA; border-radius: 15px; border: none;")
+        self.status_box = QFrame(); self.status_box.setFixedHeight(120); self.status_box.setStyleSheet("background-color: #F8F9FA; border-radius: 15px; border: none;")
         status_layout = QVBoxLayout(self.status_box); status_layout.setSpacing(5)
         self.lbl_status = QLabel("🔴 未运行"); self.lbl_status.setFont(QFont("Microsoft YaHei UI", 14, QFont.Bold))
         self.lbl_address = QLabel(f"💻 http://127.0.0.1:{DEFAULT_PORT}"); self.lbl_address.setStyleSheet("border: none;")
-        status_layout.addWidget(self.lbl_status); status_layout.addWidget(self.lbl_address); side_layout.addWidget(self.status_box)
+        self.lbl_latency = QLabel("⏱ 延迟: --"); self.lbl_latency.setStyleSheet("color: #868E96; border: none;")
+        status_layout.addWidget(self.lbl_status); status_layout.addWidget(self.lbl_address); status_layout.addWidget(self.lbl_latency); side_layout.addWidget(self.status_box)
+
+        self.storage_box = QFrame(); self.storage_box.setStyleSheet("background-color: #F8F9FA; border-radius: 15px; border: none;")
+        storage_layout = QVBoxLayout(self.storage_box); storage_layout.setSpacing(2); storage_layout.addWidget(QLabel("💾 存储健康", font=QFont("Microsoft YaHei UI", 10, QFont.Bold)))
+        self.lbl_storages = QLabel("服务运行后自动探测已挂载的存储..."); self.lbl_storages.setWordWrap(True); self.lbl_storages.setStyleSheet("color: #495057; border: none; font-family: 'Consolas'; font-size: 11px;")
+        storage_layout.addWidget(self.lbl_storages); side_layout.addWidget(self.storage_box)
+
+        self.metrics_box = QFrame(); self.metrics_box.setStyleSheet("background-color: #F8F9FA; border-radius: 15px; border: none;")
+        metrics_layout = QVBoxLayout(self.metrics_box); metrics_layout.setSpacing(2); metrics_layout.addWidget(QLabel("📈 资源占用", font=QFont("Microsoft YaHei UI", 10, QFont.Bold)))
+        self.lbl_metrics = QLabel("等待采样..."); self.lbl_metrics.setStyleSheet("color: #495057; border: none; font-family: 'Consolas'; font-size: 11px;")
+        self.lbl_overhead = QLabel(""); self.lbl_overhead.setStyleSheet("color: #ADB5BD; border: none; font-size: 10px;")
+        metrics_layout.addWidget(self.lbl_metrics); metrics_layout.addWidget(self.lbl_overhead); side_layout.addWidget(self.metrics_box)
 
         self.cred_box = QFrame(); self.cred_box.setStyleSheet("background-color: #FFF4E6; border-radius: 15px; border: none;")
         cred_layout = QVBoxLayout(self.cred_box); cred_header = QHBoxLayout(); cred_header.addWidget(QLabel("🔑 管理凭证", font=QFont("Microsoft YaHei UI", 10, QFont.Bold)))
@@ -176,21 +359,28 @@ class OpenListManager(QWidget):
         self.btn_stop = self.create_btn("🛑 停止服务", "#FA5252", "#FFFFFF", width=150)
         self.btn_stop.clicked.connect(lambda: self.run_command("stop"))
         self.btn_open_web = self.create_btn("🌐 管理后台", "#1098AD", "#FFFFFF", width=150)
-        self.btn_open_web.clicked.connect(lambda: webbrowser.open(f"http://127.0.0.1:{DEFAULT_PORT}"))
+        self.btn_open_web.clicked.connect(lambda: webbrowser.open(f"http://127.0.0.1:{self.current.port}"))
         btn_grid_container.addWidget(self.btn_start); btn_grid_container.addWidget(self.btn_restart); btn_grid_container.addWidget(self.btn_stop); btn_grid_container.addWidget(self.btn_open_web); btn_grid_container.addStretch()
         right_area.addLayout(btn_grid_container)
 
         right_area.addWidget(QLabel("数据维护", font=QFont("Microsoft YaHei UI", 12, QFont.Bold)))
         backup_hbox = QHBoxLayout(); backup_hbox.setSpacing(15)
-        self.btn_export = self.create_btn("📦 导出全量备份", "#15AABF", "#FFFFFF", height=45, width=220)
+        self.btn_export = self.create_btn("📦 增量备份", "#15AABF", "#FFFFFF", height=45, width=220)
         self.btn_export.clicked.connect(self.export_backup)
         self.btn_import = self.create_btn("📥 导入数据恢复", "#AE3EC9", "#FFFFFF", height=45, width=220)
         self.btn_import.clicked.connect(self.import_backup)
         backup_hbox.addWidget(self.btn_export); backup_hbox.addWidget(self.btn_import); backup_hbox.addStretch()
         right_area.addLayout(backup_hbox)
 
-        right_area.addWidget(QLabel("实时运行日志"))
-        self.log_box = QTextEdit(readOnly=True); self.log_box.setStyleSheet("background-color: #212529; color: #F8F9FA; border-radius: 15px; padding: 20px; font-family: 'Consolas'; border:none;")
+        log_head = QHBoxLayout(); log_head.addWidget(QLabel("实时运行日志")); log_head.addStretch()
+        self.cmb_log_level = QComboBox(); self.cmb_log_level.setStyleSheet("background: white; border-radius: 6px; padding: 3px;")
+        self.cmb_log_level.addItems([name for name, _ in LOG_FILTERS]); self.cmb_log_level.currentIndexChanged.connect(self.set_log_filter)
+        self.btn_errors = QPushButton("⚠️ 近 1 小时错误"); self.btn_errors.setCheckable(True); self.btn_errors.setCursor(Qt.PointingHandCursor)
+        self.btn_errors.setStyleSheet("QPushButton { background: white; border-radius: 6px; padding: 4px 10px; border: none; } QPushButton:checked { background: #FFE3E3; color: #C92A2A; }")
+        self.btn_errors.clicked.connect(self.toggle_recent_errors)
+        log_head.addWidget(self.btn_errors); log_head.addWidget(self.cmb_log_level); right_area.addLayout(log_head)
+        self.log_box = QPlainTextEdit(readOnly=True); self.log_box.setMaximumBlockCount(LOG_CAPACITY); self.log_box.setUndoRedoEnabled(False)
+        self.log_box.setStyleSheet("background-color: #212529; color: #F8F9FA; border-radius: 15px; padding: 20px; font-family: 'Consolas'; border:none;")
         right_area.addWidget(self.log_box); content_hbox.addLayout(right_area, stretch=1)
 
     def initTray(self):
@@ -218,135 +408,261 @@ class OpenListManager(QWidget):
         btn.setStyleSheet(f"QPushButton {{ background: {bg}; color: white; border-radius: 8px; border:none; font-size: 10px; font-weight:bold; }} QPushButton:pressed {{ padding-top: 1px; padding-left: 1px; }}")
         return btn
 
-    def refresh_status(self):
-        is_running = False
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(0.1); is_running = (s.connect_ex(('127.0.0.1', DEFAULT_PORT)) == 0)
-        except: pass
+    def refresh_status(self, state):
+        # 仅在当前实例状态切换 / 切换实例时调用，避免每秒重设样式表
+        is_running = state != "stopped"
         self.update_tray_icon(is_running)
-        if is_running:
+        if state == "running":
             self.lbl_status.setText("🟢 正在运行"); self.lbl_status.setStyleSheet("color: white; border: none;")
             self.status_box.setStyleSheet("background-color: #40C057; border-radius: 15px; border: none;")
-            self.lbl_address.setStyleSheet("color: #EBFBEE; border: none;"); self.btn_start.setEnabled(False)
+            self.lbl_address.setStyleSheet("color: #EBFBEE; border: none;"); self.lbl_latency.setStyleSheet("color: #EBFBEE; border: none;"); self.btn_start.setEnabled(False)
+        elif state == "degraded":
+            self.lbl_status.setText("🟠 响应异常"); self.lbl_status.setStyleSheet("color: white; border: none;")
+            self.status_box.setStyleSheet("background-color: #FD7E14; border-radius: 15px; border: none;")
+            self.lbl_address.setStyleSheet("color: #FFF4E6; border: none;"); self.lbl_latency.setStyleSheet("color: #FFF4E6; border: none;"); self.btn_start.setEnabled(False)
         else:
             self.lbl_status.setText("🔴 未在运行"); self.lbl_status.setStyleSheet("color: #FA5252; border: none;")
             self.status_box.setStyleSheet("background-color: #F8F9FA; border-radius: 15px; border: none;")
-            self.lbl_address.setStyleSheet("color: #868E96; border: none;"); self.btn_start.setEnabled(True)
-
-    def handle_incoming_log(self, msg):
-        self.log(msg)
-        p_match = re.search(r"initial password is:\s*(\S+)", msg)
-        if p_match:
-            self.raw_password = p_match.group(1); QApplication.clipboard().setText(self.raw_password)
-            self.lbl_admin_pwd.setText(f"密码: {self.raw_password}"); self.tips_bar.show()
-
-    def run_command(self, action):
-        if not self.app_path: return
-        if action == "stop": self.kill_all(); self.log("🛑 停止服务")
-        elif action == "start":
-            self.log("🚀 拉起服务..."); self.thread = LogThread([self.app_path, "server", "--force-bin-dir"], os.path.dirname(self.app_path))
-            self.thread.new_log.connect(self.handle_incoming_log); self.thread.start()
-        elif action == "restart":
-            self.log("🔄 重启联动..."); self.kill_all(); QTimer.singleShot(1000, lambda: self.run_command("start"))
-
-    def kill_all(self):
-        if not self.app_path: return
-        name = os.path.basename(self.app_path)
-        for proc in psutil.process_iter(['name']):
-            try:
-                if proc.info['name'].lower() == name.lower(): proc.kill()
-            except: pass
+            self.lbl_address.setStyleSheet("color: #868E96; border: none;"); self.lbl_latency.setStyleSheet("color: #868E96; border: none;"); self.btn_start.setEnabled(True)
+
+    def flush_logs(self):
+        # 一个定时器统一收取所有实例的日志，只有当前实例的批次会渲染到视图
+        stamp = f"[{time.strftime('%H:%M:%S')}] "
+        for inst in self.instances:
+            batch = inst.log_buffer.drain(stamp)
+            if not batch: continue
+            if inst is self.current and not self.btn_errors.isChecked():
+                rank = self.log_min_rank; shown = [str(r) for r in batch if LEVEL_RANK[r.level] >= rank]
+                if shown: self.log_box.appendPlainText("\n".join(shown))
+            events = [r for r in batch if r.event]
+            if events: self.on_log_events(inst, events)
+
+    def toggle_recent_errors(self, checked):
+        # 用日志文件的磁盘索引直接定位最近一小时的 error 及以上，不读整份文件；再点一次回到实时日志
+        if not checked: self.render_logs(); return
+        inst, path = self.current, self.current.log_path
+        if not path: self.btn_errors.setChecked(False); self.log("ℹ️ 该实例未开启文件日志 (data/config.json 的 log.enable)"); return
+        if self.history_thread and self.history_thread.isRunning(): return
+        def query():
+            history = LogHistory(path); history.refresh()
+            return history.query(time.time() - LOG_ERROR_WINDOW, LEVEL_RANK["error"])
+        self.history_thread = TaskThread(query); self.history_thread.done.connect(lambda lines: self.show_recent_errors(inst, lines)); self.history_thread.start()
+
+    def show_recent_errors(self, inst, lines):
+        if inst is not self.current or not self.btn_errors.isChecked(): return
+        if lines is None: self.btn_errors.setChecked(False); self.log("❌ 日志历史查询失败", inst); return
+        head = f"—— 近 {LOG_ERROR_WINDOW // 3600} 小时共 {len(lines)} 条错误，来自 {inst.log_path}，再次点击返回实时日志 ——"
+        self.log_box.setPlainText("\n".join([head] + lines)); self.log_box.moveCursor(QTextCursor.End)
+
+    def on_log_events(self, inst, events):
+        # 事件由解析引擎在采集线程里识别好，这里只做界面响应；ready 已由 Supervisor 处理
+        alerts = []
+        for rec in events:
+            if rec.event == "initial_password":
+                inst.raw_password = rec.value; self.update_cred_labels(inst)
+                if inst is self.current: QApplication.clipboard().setText(inst.raw_password); self.tips_bar.show()
+            elif rec.event in LOG_EVENT_ALERTS: alerts.append(rec)
+        if alerts:
+            more = f" (另有 {len(alerts) - 1} 条)" if len(alerts) > 1 else ""
+            self.tray_icon.showMessage(f"{inst.name}: {LOG_EVENT_ALERTS[alerts[0].event]}{more}", alerts[0].message, QSystemTrayIcon.Warning, 5000)
+
+    def update_cred_labels(self, inst):
+        if inst is not self.current: return
+        self.lbl_admin_user.setText(f"用户: {inst.raw_username}"); self.lbl_admin_pwd.setText(f"密码: {inst.raw_password}" if inst.raw_password else "密码: ********")
+
+    def run_command(self, action, inst=None):
+        inst = inst or self.current
+        if not inst.path: return
+        if action == "stop": inst.supervisor.stop(then=lambda: self.log("🛑 服务已停止", inst))
+        elif action == "start": self.log("🚀 拉起服务...", inst); inst.supervisor.start(inst.path)
+        elif action == "restart": self.log("🔄 重启联动...", inst); inst.supervisor.restart()
+        self.prober.poke(inst.name)
 
     def set_admin_password(self):
-        if not self.app_path: return
-        pwd, ok = QInputDialog.getText(self, "修改密码", "输入新管理密码 (确定后将自动重启):", QLineEdit.Password)
+        inst = self.current
+        if not inst.path: return
+        pwd, ok = QInputDialog.getText(self, "修改密码", "输入新管理密码 (优先在线修改，无需重启):", QLineEdit.Password)
         if ok and pwd:
-            subprocess.Popen([self.app_path, "admin", "set", pwd], cwd=os.path.dirname(self.app_path), creationflags=0x08000000).wait()
-            self.raw_password = pwd; self.lbl_admin_pwd.setText(f"密码: {pwd}"); self.log("✅ 密码已修改"); self.run_command("restart")
+            self.cred_thread = TaskThread(lambda: self._set_password_api(inst, pwd))
+            self.cred_thread.done.connect(lambda ok: self.on_password_set(inst, ok, pwd)); self.cred_thread.start()
+
+    def _set_password_api(self, inst, pwd):
+        if not inst.ensure_admin_token(): return False
+        try: inst.admin.set_password(pwd)
+        except Exception:
+            # 缓存的 token 可能已过期，重新登录后再试一次
+            inst.admin.token = None
+            if not inst.ensure_admin_token(): return False
+            inst.admin.set_password(pwd)
+        return True
+
+    def on_password_set(self, inst, ok, pwd):
+        if ok:
+            inst.raw_username = inst.admin.username; inst.raw_password = pwd
+            self.update_cred_labels(inst); self.log("✅ 密码已在线修改，服务未中断", inst)
+        else:
+            # API 不可用 (服务未运行 / 无有效凭证) 时才走命令行 + 重启
+            self.log("⚠️ 在线修改不可用，改用命令行并重启服务...", inst)
+            subprocess.Popen([inst.path, "admin", "set", pwd], cwd=os.path.dirname(inst.path), creationflags=NO_WINDOW).wait()
+            inst.raw_password = pwd; self.update_cred_labels(inst); self.log("✅ 密码已修改", inst); self.run_command("restart", inst)
 
     def get_admin_info(self):
-        if not self.app_path: return
-        self.log("🔍 正在提取凭证..."); self.kill_all(); time.sleep(1.5)
+        inst = self.current
+        if not inst.path: return
+        self.log("🔍 正在提取凭证...", inst)
+        self.cred_thread = TaskThread(lambda: self._fetch_admin(inst)); self.cred_thread.done.connect(lambda result: self.on_admin_fetched(inst, result)); self.cred_thread.start()
+
+    def _fetch_admin(self, inst):
+        # 数据库里的明文 (旧版) 即使校验不了也可信；内存缓存的密码可能已在网页里改过，校验不通过就当没有
+        user, pwd = read_admin_from_db(os.path.join(inst.data_dir, "data.db")); from_db = bool(pwd)
+        user, pwd = user or inst.raw_username, pwd or (inst.raw_password if user in (None, inst.raw_username) else "")
+        if not (user and pwd): return None
+        try: inst.admin.login(user, pwd); verified = True
+        except Exception: verified = False
+        return (user, pwd, verified) if verified or from_db else None
+
+    def on_admin_fetched(self, inst, result):
+        if not result:
+            # 数据库中只有密码哈希且没有缓存：退回 停机 → admin show → 拉起 的老路径
+            self.log("⚠️ 无法在线读取凭证，改用命令行 (需短暂停机)...", inst)
+            inst.supervisor.stop(then=lambda: self._show_admin(inst)); return
+        user, pwd, verified = result
+        inst.raw_username, inst.raw_password = user, pwd; self.update_cred_labels(inst)
+        if inst is self.current: QApplication.clipboard().setText(pwd); self.tips_bar.show()
+        self.log("✅ 凭证已读取并通过在线校验，服务未中断" if verified else "✅ 凭证已从数据库只读读取，服务未中断", inst)
+
+    def _show_admin(self, inst):
         try:
-            cmd = [self.app_path, "admin", "show"]
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=os.path.dirname(self.app_path), text=True, creationflags=0x08000000)
-            output, _ = process.communicate(); clean_output = re.compile(r'\x1b\[[0-9;]*m').sub('', output)
+            cmd = [inst.path, "admin", "show"]
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=os.path.dirname(inst.path), text=True, creationflags=NO_WINDOW)
+            output, _ = process.communicate(); clean_output = ANSI_RE.sub('', output)
             p_match = re.search(r"(?:password|password is):\s*(\S+)", clean_output, re.IGNORECASE)
             if p_match: 
-                self.raw_password = p_match.group(1); QApplication.clipboard().setText(self.raw_password)
-                self.lbl_admin_pwd.setText(f"密码: {self.raw_password}"); self.tips_bar.show()
-            self.run_command("start")
-        except: self.log("❌ 获取失败"); self.run_command("start")
+                inst.raw_password = p_match.group(1); self.update_cred_labels(inst)
+                if inst is self.current: QApplication.clipboard().setText(inst.raw_password); self.tips_bar.show()
+            self.run_command("start", inst)
+        except: self.log("❌ 获取失败", inst); self.run_command("start", inst)
 
     def export_backup(self):
-        save_path, _ = QFileDialog.getSaveFileName(self, "导出备份", "Alist_Backup.zip", "Zip (*.zip)")
-        if save_path:
-            shutil.make_archive(save_path.replace('.zip', ''), 'zip', os.path.join(os.path.dirname(self.app_path), "data"))
-            self.log("✅ 备份已导出")
-
-    # --- 【重点修复】导入数据恢复底层加固 ---
-    def import_backup(self):
         if not self.app_path: return
-        file_path, _ = QFileDialog.getOpenFileName(self, "选择恢复文件", "", "Zip (*.zip)")
+        repo = QFileDialog.getExistingDirectory(self, "选择备份仓库目录", self.backup_repo or os.path.dirname(self.app_path))
+        if not repo: return
+        self.backup_repo = os.path.normpath(repo); save_backup_repo(self.backup_repo)
+        self.queue_backup([self.current])
+
+    def instance_repo(self, inst): return os.path.join(self.backup_repo, inst.name)
+
+    def queue_backup(self, instances):
+        # 各实例在同一仓库下分目录存放，同一时间只跑一个备份线程
+        for inst in instances:
+            if inst.path and inst not in self.backup_queue: self.backup_queue.append(inst)
+        self.pump_backup()
+
+    def pump_backup(self):
+        if self.backup_thread and self.backup_thread.isRunning() or not self.backup_queue: return
+        inst = self.backup_queue.popleft()
+        self.log("📦 开始增量备份...", inst); self.btn_export.setEnabled(False)
+        self.backup_thread = BackupThread(inst.data_dir, self.instance_repo(inst))
+        self.backup_thread.progress.connect(lambda pct: self.btn_export.setText(f"📦 备份中 {pct}%"))
+        self.backup_thread.done.connect(lambda msg: self.on_backup_done(inst, msg)); self.backup_thread.start()
+
+    def on_backup_done(self, inst, msg):
+        self.log(msg, inst); self.btn_export.setText("📦 增量备份"); self.btn_export.setEnabled(True)
+        QTimer.singleShot(0, self.pump_backup)
+
+    # --- 数据恢复：暂存校验 → 停机切换 → 健康检查，失败自动回滚 ---
+    def import_backup(self):
+        inst = self.current
+        if not inst.path: return
+        if self.restore_thread and self.restore_thread.isRunning() or self.restore_inst: self.log("⏳ 恢复仍在进行中"); return
+        start_dir = os.path.join(self.instance_repo(inst), "snapshots") if self.backup_repo else ""
+        file_path, _ = QFileDialog.getOpenFileName(self, "选择恢复文件", start_dir, "备份 (*.zip *.json)")
         if not file_path: return
-        
-        self.log("📦 准备数据恢复，正在彻底清理环境...")
-        self.kill_all() # 1. 尝试停止服务
-        time.sleep(2) # 2. 增加等待时间，确保操作系统完全释放文件句柄
-        
-        try:
-            # 再次确认 alist 进程是否已彻底消失
-            name = os.path.basename(self.app_path)
-            for proc in psutil.process_iter(['name']):
-                if proc.info['name'].lower() == name.lower():
-                    proc.kill()
-            
-            with zipfile.ZipFile(file_path, 'r') as z:
-                # 3. 执行解压覆盖
-                z.extractall(os.path.dirname(self.app_path))
-            
-            self.log("✅ 恢复成功！系统将自动重启服务...")
-            QTimer.singleShot(1000, lambda: self.run_command("start")) # 4. 自动重启
-            
-        except PermissionError:
-            # 捕获权限占用错误，避免闪退
-            self.log("❌ 崩溃预防：文件被占用，请右键管理员运行后再试")
+        # 1. 服务保持运行，先解压到暂存目录并逐项校验
+        self.restore_inst = inst
+        self.log("📦 正在暂存并校验备份，服务保持运行...", inst); self.btn_import.setEnabled(False)
+        self.restore_thread = RestoreThread(file_path, inst.data_dir + ".staging")
+        self.restore_thread.progress.connect(lambda pct: self.btn_import.setText(f"📥 校验中 {pct}%"))
+        self.restore_thread.staged.connect(self.swap_restore); self.restore_thread.failed.connect(self.on_restore_failed)
+        self.restore_thread.start()
+
+    def finish_restore(self): self.restore_inst = None; self.btn_import.setText("📥 导入数据恢复"); self.btn_import.setEnabled(True)
+
+    def on_restore_failed(self, msg):
+        self.log(f"❌ 备份校验失败，线上数据未改动: {msg}", self.restore_inst); self.finish_restore()
+        QMessageBox.warning(self, "恢复失败", f"备份文件无效或已损坏，未做任何改动:\n{msg}")
+
+    def swap_restore(self, staging):
+        # 2. 校验通过后才停机，停机窗口只包含目录切换与 alist 启动
+        inst = self.restore_inst
+        self.log("🔁 校验通过，停止服务并切换数据目录...", inst); self.restore_down_at = time.perf_counter()
+        inst.supervisor.stop(then=lambda: self._swap_data(inst, staging))
+
+    def _swap_data(self, inst, staging):
+        inst.unfollow_log()   # data/log 下的日志文件随目录一起切换
+        try: rollback = swap_in(inst.data_dir, staging)
+        except OSError as e:
+            self.finish_restore()
+            self.log(f"❌ 切换失败，已保持原数据: {e}", inst)
             QMessageBox.critical(self, "恢复失败", "某些文件仍被系统占用，请尝试手动关闭所有 alist.exe 进程后再试。")
-            self.run_command("start")
-        except Exception as e:
-            # 捕获通用错误
-            self.log(f"❌ 恢复崩溃: {e}")
-            QMessageBox.warning(self, "异常提醒", f"恢复过程遇到未知错误: {e}")
-            self.run_command("start")
-
-    def log(self, msg, color="#63E6BE"): self.log_box.append(f"<span style='color:{color};'>[{time.strftime('%H:%M:%S')}]</span> {msg}")
+            self.run_command("start", inst); inst.follow_log(); return
+        # 3. 拉起服务，限时内未就绪则回滚
+        self.restore_rollback = rollback; self.restore_token += 1; token = self.restore_token
+        self.run_command("start", inst); inst.follow_log()
+        QTimer.singleShot(RESTORE_HEALTH_TIMEOUT * 1000, lambda: self._restore_timeout(token))
+
+    def on_restore_ready(self, inst):
+        # 4. 就绪后再校验一次线上数据 (仍有管理员账号等)，确认前不删除回滚目录
+        if inst is not self.restore_inst or not self.restore_rollback or self.verify_thread and self.verify_thread.isRunning(): return
+        token = self.restore_token
+        self.verify_thread = TaskThread(lambda: self._verify_restore(inst)); self.verify_thread.done.connect(lambda error: self.on_restore_verified(token, error)); self.verify_thread.start()
+
+    def _verify_restore(self, inst):
+        try: check_data_dir(inst.data_dir); return ""
+        except ValueError as e: return str(e)
+
+    def on_restore_verified(self, token, error):
+        if token != self.restore_token or not self.restore_rollback: return
+        if error is None or error: self._restore_timeout(token, f"恢复后的数据校验未通过: {error or '未知错误'}"); return
+        inst, rollback, self.restore_rollback = self.restore_inst, self.restore_rollback, None
+        threading.Thread(target=shutil.rmtree, args=(rollback,), kwargs={"ignore_errors": True}, daemon=True).start()
+        self.finish_restore(); self.log(f"✅ 恢复成功！停机 {time.perf_counter() - self.restore_down_at:.1f}s", inst)
+
+    def _restore_timeout(self, token, reason="恢复后服务未通过健康检查"):
+        if token != self.restore_token or not self.restore_rollback: return
+        inst, rollback, self.restore_rollback = self.restore_inst, self.restore_rollback, None
+        self.log(f"❌ {reason}，正在回滚到原数据...", inst)
+        inst.supervisor.stop(then=lambda: self._rollback(inst, rollback))
+
+    def _rollback(self, inst, rollback):
+        inst.unfollow_log()
+        try: self.log(f"↩️ 已回滚，失败的数据保留在 {roll_back(inst.data_dir, rollback)}", inst)
+        except OSError as e: self.log(f"❌ 回滚失败，原数据位于 {rollback}: {e}", inst)
+        self.finish_restore(); self.run_command("start", inst); inst.follow_log()
+        QMessageBox.warning(self, "恢复失败", "恢复后的服务未能正常启动，已自动回滚到恢复前的数据。")
+
+    def log(self, msg, inst=None): (inst or self.current).log_buffer.append(msg)
     
     def change_path(self):
         p, _ = QFileDialog.getOpenFileName(self, "定位 alist.exe", "", "EXE (*.exe)")
         if p: 
-            self.app_path = os.path.normpath(p)
-            with open(CONFIG_FILE, "w", encoding="utf-8") as f: f.write(p)
-            hide_file(CONFIG_FILE)
+            self.current.set_path(p); save_instances(self.instances)
             self.log("⚙️ 路径更新成功")
 
     def quick_copy(self, mode):
-        content = self.raw_username if mode == "user" else self.raw_password
+        content = self.current.raw_username if mode == "user" else self.current.raw_password
         QApplication.clipboard().setText(content); self.log(f"📋 已手动复制")
-    def force_quit(self): self.save_geometry(); self.tray_icon.hide(); QApplication.quit()
+    def force_quit(self):
+        for inst in self.instances: inst.supervisor.wanted = False; inst.unfollow_log()
+        self.prober.stop(); self.sampler.stop(); self.storage_prober.stop()
+        if self.metrics_server: self.metrics_server.shutdown()
+        self.save_geometry(); self.tray_icon.hide(); QApplication.quit()
     def closeEvent(self, event): self.save_geometry(); self.hide(); event.ignore()
 
-class LogThread(QThread):
-    new_log = pyqtSignal(str)
-    def __init__(self, cmd, cwd): super().__init__(); self.cmd, self.cwd = cmd, cwd
-    def run(self):
-        process = subprocess.Popen(self.cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=self.cwd, text=True, bufsize=1, creationflags=0x08000000)
-        for line in iter(process.stdout.readline, ''):
-            if line: self.new_log.emit(line.strip())
-        process.stdout.close()
-
 if __name__ == '__main__':
     try: ctypes.windll.shcore.SetProcessDpiAwareness(1)
     except: pass
-    app = QApplication(sys.argv); app.setQuitOnLastWindowClosed(False)
-    manager = OpenListManager(); manager.show(); sys.exit(app.exec_())
+    app = QApplication(sys.argv); app.setQuitOnLastWindowClosed(False); PROFILE.mark("qapp")
+    manager = OpenListManager(); manager.show(); PROFILE.mark("show")
+    QTimer.singleShot(0, lambda: manager.on_first_frame(PROFILE_STARTUP))
+    sys.exit(app.exec_())
@@ -0,0 +1,202 @@
+# 伴侣热点路径基准：用 bench/fake_alist.py 充当 alist，结果输出为 JSON，便于跨版本对比
+# 场景: log (日志采集吞吐 + 可选的 Qt 日志视图渲染)、probe (探测延迟与主线程停顿)、restart (重启到就绪)、
+#       backup (增量备份 / 暂存恢复吞吐)、parse (日志解析引擎，见 bench_log_engine.py)
+# 用法: python bench/bench_companion.py [--only log,probe,...] [--quick] [--out results.json]
+import os
+import sys
+import json
+import time
+import queue
+import random
+import shutil
+import socket
+import sqlite3
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR)); sys.path.insert(0, BENCH_DIR)
+from openlist_core import *
+import bench_log_engine
+
+def free_port():
+    with socket.socket() as s: s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+def make_install(root, port):
+    # 在 root 下布置 "alist" 可执行文件与 data/config.json；Windows 下用 .bat 包一层
+    os.makedirs(os.path.join(root, "data"), exist_ok=True)
+    with open(os.path.join(root, "data", "config.json"), "w", encoding="utf-8") as f: json.dump({"scheme": {"http_port": port}, "log": {"enable": False}}, f)
+    shutil.copy(os.path.join(BENCH_DIR, "fake_alist.py"), os.path.join(root, "fake_alist.py"))
+    if os.name == "nt":
+        app = os.path.join(root, "alist.bat")
+        with open(app, "w") as f: f.write(f'@"{sys.executable}" "%~dp0fake_alist.py" %*\n')
+    else:
+        app = os.path.join(root, "alist")
+        with open(app, "w") as f: f.write(f"#!{sys.executable}\n" + open(os.path.join(BENCH_DIR, "fake_alist.py"), encoding="utf-8").read())
+        os.chmod(app, 0o755)
+    return app
+
+def pct(values, q):
+    if not values: return None
+    values = sorted(values); return round(values[min(len(values) - 1, int(q * len(values)))], 3)
+
+def summarize(values): return {"n": len(values), "p50": pct(values, 0.5), "p95": pct(values, 0.95), "max": round(max(values), 3) if values else None}
+
+class Loop:
+    # 与守护进程相同的单线程回调队列；记录每一拍超出预期的延迟，近似界面主线程的停顿
+    def __init__(self, tick=0.01): self.calls = queue.Queue(); self.tick = tick; self.stalls = []
+    def dispatch(self, fn, *args): self.calls.put((fn, args))
+    def pump(self, seconds, until=lambda: False):
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline and not until():
+            t0 = time.perf_counter()
+            try:
+                fn, args = self.calls.get(timeout=self.tick)
+                while True: fn(*args); fn, args = self.calls.get_nowait()
+            except queue.Empty: pass
+            self.stalls.append(max(0.0, (time.perf_counter() - t0 - self.tick) * 1000))
+        return until()
+
+def stop_sync(sup, loop):
+    done = threading.Event(); sup.stop(then=done.set); loop.pump(STOP_GRACE * 2 + 2, done.is_set)
+
+# --- 场景 ---
+def bench_log(args, tmp):
+    # fake alist 就绪后尽快吐出 N 行：LogReader 逐行解析进 LogBuffer，主循环按 GUI 的 100ms 节奏批量取走
+    # 只统计这 N 行突发日志 (不含启动日志与伴侣提示)；采集结束后继续取到缓冲为空，drain / 渲染数据覆盖全部留存的行
+    os.environ.update(FAKE_ALIST_STARTUP="0", FAKE_ALIST_LOG_LINES=str(args.log_lines))
+    app = make_install(os.path.join(tmp, "log"), free_port()); buf = LogBuffer(); seen = [0, None, None]
+    burst = lambda rec: "list /fake/" in rec.message or "slow request #" in rec.message
+    class Counting:
+        def append(self, rec):
+            buf.append(rec)
+            if isinstance(rec, LogRecord) and burst(rec): now = time.perf_counter(); seen[0] += 1; seen[1] = seen[1] or now; seen[2] = now
+    loop = Loop(); sup = Supervisor(Counting(), loop.dispatch); drained, drain_ms, batches = 0, [], []
+    sup.start(app); deadline = time.perf_counter() + 120
+    while time.perf_counter() < deadline:
+        ingesting = seen[0] < args.log_lines
+        if ingesting: time.sleep(0.1)
+        d0 = time.perf_counter(); batch = buf.drain("[00:00:00] ")
+        if not batch and not ingesting: break
+        text = "\n".join(map(str, batch)); drain_ms.append((time.perf_counter() - d0) * 1000)
+        drained += sum(1 for rec in batch if burst(rec)); batches.append(text)
+    stop_sync(sup, loop)
+    span = (seen[2] - seen[1]) if seen[1] and seen[2] > seen[1] else None
+    # lines_dropped：界面节奏跟不上时 LogBuffer 定长队列丢弃的最旧行，属于有意的背压
+    result = {"lines_emitted": args.log_lines, "lines_ingested": seen[0], "lines_drained": drained, "lines_dropped": seen[0] - drained,
+              "seconds": round(span, 3) if span else None, "lines_per_sec": round(seen[0] / span) if span else None, "drain_ms": summarize(drain_ms)}
+    result["view"] = bench_log_view(batches)
+    os.environ.pop("FAKE_ALIST_LOG_LINES"); return result
+
+def bench_log_view(batches):
+    # 可选：同样的批次追加到离屏 QPlainTextEdit，量每次刷新的渲染耗时；没有 PyQt5 时跳过
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication, QPlainTextEdit
+    except ImportError: return {"skipped": "PyQt5 not installed"}
+    app = QApplication.instance() or QApplication([]); box = QPlainTextEdit(readOnly=True); box.setMaximumBlockCount(LOG_CAPACITY); box.setUndoRedoEnabled(False); box.show()
+    costs = []
+    for text in batches:
+        if not text: continue
+        t0 = time.perf_counter(); box.appendPlainText(text); app.processEvents(); costs.append((time.perf_counter() - t0) * 1000)
+    return {"append_ms": summarize(costs)}
+
+def bench_probe(args, tmp):
+    # 不同 /ping 注入延迟下：probe_port 往返耗时，以及 ProbeScheduler 工作时主循环的最大停顿
+    results = {}
+    for latency in args.ping_latency:
+        os.environ.update(FAKE_ALIST_STARTUP="0", FAKE_ALIST_PING_LATENCY=str(latency))
+        port = free_port(); app = make_install(os.path.join(tmp, f"probe{latency}"), port)
+        loop = Loop(); sup = Supervisor(LogBuffer(), loop.dispatch); sup.start(app)
+        loop.pump(10, lambda: probe_port(port)[0] == "running")
+        rtt = [probe_port(port)[1] for _ in range(args.probes)]
+        scheduler = ProbeScheduler(loop.dispatch); scheduler.on_state = lambda *a: None; scheduler.set_targets({"bench": port}); scheduler.start()
+        loop.stalls = []; end = time.perf_counter() + args.probe_seconds
+        while time.perf_counter() < end: scheduler.poke("bench"); loop.pump(0.05)
+        scheduler.stop(); stop_sync(sup, loop)
+        # 探测在后台线程，ui_stall 应与注入延迟无关；若回到主线程同步探测，每次停顿就是一次 rtt
+        results[f"{latency}ms"] = {"rtt_ms": summarize([v for v in rtt if v is not None]), "ui_stall_ms": summarize(loop.stalls)}
+    os.environ.pop("FAKE_ALIST_PING_LATENCY"); return results
+
+def bench_restart(args, tmp):
+    # 与界面 run_command("restart") 相同的路径：Supervisor.restart → 终止 → 拉起 → 日志就绪行
+    os.environ.update(FAKE_ALIST_STARTUP=str(args.startup))
+    app = make_install(os.path.join(tmp, "restart"), free_port()); loop = Loop(); sup = Supervisor(LogBuffer(), loop.dispatch); ready = []
+    sup.on_ready = lambda secs: ready.append(secs)
+    sup.start(app); loop.pump(15, lambda: ready)
+    times = []
+    for _ in range(args.restarts):
+        n = len(ready); t0 = time.perf_counter(); sup.restart()
+        if loop.pump(15, lambda: len(ready) > n): times.append((time.perf_counter() - t0) * 1000)
+    stop_sync(sup, loop)
+    return {"fake_startup_s": args.startup, "restart_to_ready_ms": summarize(times), "start_to_ready_ms": summarize([s * 1000 for s in ready])}
+
+def make_data_dir(path, size_mb, files):
+    # 合成 data 目录：config.json、带管理员与一批存储行的 data.db、若干随机内容文件 (另有一份重复文件用于去重)
+    os.makedirs(path, exist_ok=True); rnd = random.Random(7)
+    with open(os.path.join(path, "config.json"), "w", encoding="utf-8") as f: json.dump({"database": {"type": "sqlite3"}}, f)
+    conn = sqlite3.connect(os.path.join(path, "data.db"))
+    conn.execute("CREATE TABLE x_users (id INTEGER PRIMARY KEY, username TEXT, password TEXT, role INTEGER)")
+    conn.execute("INSERT INTO x_users (username, password, role) VALUES ('admin', '', ?)", (ADMIN_ROLE,))
+    conn.execute("CREATE TABLE x_storages (id INTEGER PRIMARY KEY, mount_path TEXT, addition TEXT)")
+    conn.executemany("INSERT INTO x_storages (mount_path, addition) VALUES (?, ?)", ((f"/m{i}", "x" * 200) for i in range(20000))); conn.commit(); conn.close()
+    per = size_mb * 1024 * 1024 // files
+    for i in range(files):
+        os.makedirs(os.path.join(path, "files", str(i % 8)), exist_ok=True)
+        with open(os.path.join(path, "files", str(i % 8), f"f{i}.bin"), "wb") as f: f.write(rnd.randbytes(per))
+    shutil.copy(os.path.join(path, "files", "0", "f0.bin"), os.path.join(path, "files", "dup.bin"))
+
+def dir_bytes(path): return sum(os.path.getsize(os.path.join(r, n)) for r, _, names in os.walk(path) for n in names)
+
+def bench_backup(args, tmp):
+    # export_backup / import_backup 背后的 BackupEngine、stage_restore、swap_in
+    data, repo = os.path.join(tmp, "bk", "data"), os.path.join(tmp, "bk", "repo"); make_data_dir(data, args.backup_mb, args.backup_files)
+    total = dir_bytes(data); mb = total / 1048576; out = {"data_mb": round(mb, 2)}
+    engine = BackupEngine(data, repo); t0 = time.perf_counter(); name, count, _ = engine.run(); full = time.perf_counter() - t0
+    out["full"] = {"seconds": round(full, 3), "mb_per_sec": round(mb / full, 1), "files": count, "chunks_written": engine.written}
+    with open(os.path.join(data, "files", "1", "f1.bin"), "r+b") as f: f.write(b"changed")
+    engine = BackupEngine(data, repo); t0 = time.perf_counter(); engine.run(); inc = time.perf_counter() - t0
+    out["incremental"] = {"seconds": round(inc, 3), "chunks_written": engine.written}
+    repo_mb = dir_bytes(repo) / 1048576; out["repo_mb"] = round(repo_mb, 2)
+    staging = data + ".staging"; t0 = time.perf_counter(); stage_restore(os.path.join(repo, "snapshots", name), staging); stage = time.perf_counter() - t0
+    out["restore_stage"] = {"seconds": round(stage, 3), "mb_per_sec": round(mb / stage, 1)}
+    t0 = time.perf_counter(); rollback = swap_in(data, staging); out["restore_swap_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    shutil.rmtree(rollback, ignore_errors=True); return out
+
+def bench_parse(args, tmp):
+    lines = bench_log_engine.make_lines(args.log_lines)
+    return [bench_log_engine.measure(lines, LOG_RULES + tuple((f"extra_{i}", f"extra{i}", rf"extra{i} never matches:\s*(\S+)", None) for i in range(extra))) for extra in (0, 100)]
+
+SCENARIOS = {"parse": bench_parse, "log": bench_log, "probe": bench_probe, "restart": bench_restart, "backup": bench_backup}
+
+def main():
+    ap = argparse.ArgumentParser(description="OpenList Companion 基准")
+    ap.add_argument("--only", default=",".join(SCENARIOS), help="逗号分隔的场景: " + ",".join(SCENARIOS))
+    ap.add_argument("--quick", action="store_true", help="缩小规模，用于冒烟")
+    ap.add_argument("--out", help="结果另存为 JSON 文件")
+    ap.add_argument("--log-lines", type=int, default=200000); ap.add_argument("--probes", type=int, default=200)
+    ap.add_argument("--ping-latency", type=lambda s: [int(v) for v in s.split(",")], default=[0, 50, 200], help="逗号分隔的 /ping 注入延迟 (ms)")
+    ap.add_argument("--probe-seconds", type=float, default=3.0); ap.add_argument("--restarts", type=int, default=5); ap.add_argument("--startup", type=float, default=0.2)
+    ap.add_argument("--backup-mb", type=int, default=128); ap.add_argument("--backup-files", type=int, default=64)
+    args = ap.parse_args()
+    if args.quick: args.log_lines, args.probes, args.probe_seconds, args.restarts, args.backup_mb, args.ping_latency = 20000, 30, 1.0, 2, 16, [0, 50]
+    tmp = tempfile.mkdtemp(prefix="openlist-bench-"); results = {}
+    try:
+        for name in args.only.split(","):
+            t0 = time.perf_counter(); print(f"▶ {name}", file=sys.stderr, flush=True)
+            try: results[name] = SCENARIOS[name](args, tmp)
+            except Exception as e: results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"  {time.perf_counter() - t0:.1f}s", file=sys.stderr, flush=True)
+    finally: shutil.rmtree(tmp, ignore_errors=True)
+    try: rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError: rev = None
+    report = {"bench": "openlist-companion", "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": rev, "python": platform.python_version(),
+              "platform": platform.platform(), "params": {k: v for k, v in vars(args).items() if k not in ("only", "out")}, "results": results}
+    text = json.dumps(report, ensure_ascii=False, indent=2); print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f: f.write(text + "\n")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# 日志解析引擎基准：合成带 ANSI 颜色的 alist 日志，测每秒解析行数，以及规则条数增加时的单行开销
+# 用法: python bench/bench_log_engine.py [--lines 200000] [--json]
+import os
+import sys
+import json
+import time
+import random
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from openlist_core import LogParser, LOG_RULES
+
+SAMPLES = (
+    "\x1b[36mINFO\x1b[0m[{t}] reading config file: data/config.json",
+    "\x1b[36mINFO\x1b[0m[{t}] [storage] load storage: [/local/{n}], driver: [Local]",
+    "\x1b[33mWARN\x1b[0m[{t}] [search] search index is empty, rebuild later",
+    "\x1b[31mERRO\x1b[0m[{t}] [storage] failed init storage: /remote/{n}: token expired",
+    "[GIN] 2024/05/01 - 12:00:00 | 200 |     1.20{n}ms |       127.0.0.1 | GET      \"/api/fs/list\"",
+    "\x1b[36mINFO\x1b[0m[{t}] Successfully created the admin user and the initial password is: p{n}",
+    "\x1b[36mINFO\x1b[0m[{t}] start HTTP server @ 0.0.0.0:5244",
+    "goroutine {n} [running]:",
+    # 触发词紧贴标点，确认分词不会漏掉
+    "\x1b[31mERRO\x1b[0m[{t}] [db] database is locked.",
+    "panic: runtime error: invalid memory address or nil pointer dereference",
+)
+
+def make_lines(count, seed=1):
+    rnd = random.Random(seed); t = "2024-05-01 12:00:00"
+    return [rnd.choice(SAMPLES).format(t=t, n=rnd.randrange(10000)) for _ in range(count)]
+
+def measure(lines, rules):
+    parse = LogParser(rules).parse; start = time.perf_counter(); events = 0
+    for line in lines:
+        if parse(line).event: events += 1
+    secs = time.perf_counter() - start
+    return {"rules": len(rules), "lines": len(lines), "seconds": round(secs, 4), "lines_per_sec": round(len(lines) / secs), "ns_per_line": round(secs / len(lines) * 1e9), "events": events}
+
+def main():
+    ap = argparse.ArgumentParser(); ap.add_argument("--lines", type=int, default=200000); ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(); lines = make_lines(args.lines)
+    # 追加永不命中的规则，观察单行开销是否随规则条数增长
+    results = [measure(lines, LOG_RULES + tuple((f"extra_{i}", f"extra{i}", rf"extra{i} never matches:\s*(\S+)", None) for i in range(extra))) for extra in (0, 20, 100)]
+    if args.json: print(json.dumps({"bench": "log_engine", "results": results})); return
+    for r in results: print(f"规则 {r['rules']:>4}: {r['lines_per_sec']:>10,} 行/秒  {r['ns_per_line']:>6} ns/行  事件 {r['events']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# 基准用的假 alist：只模拟伴侣关心的行为 —— 启动日志 / 初始密码 / 就绪行、/ping、凭证与存储 API、admin show / set
+# 数据目录与真 alist 一致，为程序所在目录下的 data/；端口取 data/config.json 的 scheme.http_port
+# 由环境变量调节：
+#   FAKE_ALIST_STARTUP       启动到就绪的延迟 (秒)，默认 0.2
+#   FAKE_ALIST_LOG_LINES     就绪后尽快输出的日志行数 (吞吐测试)，默认 0
+#   FAKE_ALIST_LOG_RATE      之后每秒持续输出的日志行数，默认 0
+#   FAKE_ALIST_PING_LATENCY  /ping 的额外延迟 (ms)，默认 0
+#   FAKE_ALIST_STORAGES      模拟挂载的存储数，默认 0；fs/list 延迟 FAKE_ALIST_FS_LATENCY (ms)，默认 20
+import os
+import sys
+import json
+import time
+import random
+import string
+import threading
+import http.server
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), "data")
+ADMIN_FILE = os.path.join(DATA, "fake_admin.json")
+TOKEN = "fake-token"
+env = lambda name, default: type(default)(os.environ.get(name, default))
+emit_lock = threading.Lock()
+
+def log(level, msg, color=36):
+    with emit_lock: sys.stdout.write(f"\x1b[{color}m{level}\x1b[0m[{time.strftime('%Y-%m-%d %H:%M:%S')}] {msg}\n"); sys.stdout.flush()
+
+def load_admin():
+    try:
+        with open(ADMIN_FILE, "r", encoding="utf-8") as f: return json.load(f)
+    except (OSError, ValueError): return None
+
+def save_admin(admin):
+    os.makedirs(DATA, exist_ok=True)
+    with open(ADMIN_FILE, "w", encoding="utf-8") as f: json.dump(admin, f)
+
+def read_port():
+    try:
+        with open(os.path.join(DATA, "config.json"), "r", encoding="utf-8") as f: return int(json.load(f)["scheme"]["http_port"])
+    except (OSError, ValueError, KeyError): return 5244
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    def reply(self, obj, status=200):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status); self.send_header("Content-Type", "application/json"); self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
+    def authed(self): return self.headers.get("Authorization") == TOKEN
+    def body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(n) or b"{}")
+    def do_GET(self):
+        if self.path == "/ping":
+            time.sleep(env("FAKE_ALIST_PING_LATENCY", 0.0) / 1000); return self.reply("pong")
+        if not self.authed(): return self.reply({"code": 401, "message": "token is invalidated"})
+        if self.path == "/api/me": return self.reply({"code": 200, "data": {"username": load_admin()["username"], "sso_id": ""}})
+        if self.path.startswith("/api/admin/storage/list"):
+            content = [{"mount_path": f"/fake{i}", "driver": "Local", "status": "work", "disabled": False} for i in range(env("FAKE_ALIST_STORAGES", 0))]
+            return self.reply({"code": 200, "data": {"content": content, "total": len(content)}})
+        self.reply({"code": 404, "message": "not found"}, 404)
+    def do_POST(self):
+        req, admin = self.body(), load_admin()
+        if self.path == "/api/auth/login":
+            if req.get("username") == admin["username"] and req.get("password") == admin["password"]: return self.reply({"code": 200, "data": {"token": TOKEN}})
+            return self.reply({"code": 400, "message": "password is incorrect"})
+        if not self.authed(): return self.reply({"code": 401, "message": "token is invalidated"})
+        if self.path == "/api/me/update":
+            admin["password"] = req["password"]; save_admin(admin); return self.reply({"code": 200, "data": None})
+        if self.path == "/api/fs/list":
+            time.sleep(env("FAKE_ALIST_FS_LATENCY", 20.0) / 1000); return self.reply({"code": 200, "data": {"content": [], "total": 0}})
+        self.reply({"code": 404, "message": "not found"}, 404)
+    def log_message(self, *args): pass
+
+def emit_logs():
+    burst, rate, n = env("FAKE_ALIST_LOG_LINES", 0), env("FAKE_ALIST_LOG_RATE", 0.0), 0
+    stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+    while n < burst:
+        block = [f"\x1b[36mINFO\x1b[0m[{stamp}] [storage] list /fake/{i} took {i % 97}ms" if i % 50 else f"\x1b[33mWARN\x1b[0m[{stamp}] slow request #{i}" for i in range(n, min(n + 1000, burst))]
+        with emit_lock: sys.stdout.write("\n".join(block) + "\n"); sys.stdout.flush()
+        n += len(block)
+    while rate > 0:
+        log("INFO", f"[server] heartbeat {n}"); n += 1; time.sleep(1 / rate)
+
+def server():
+    log("INFO", "reading config file: data/config.json")
+    if load_admin() is None:
+        pwd = "".join(random.choice(string.ascii_letters + string.digits) for _ in range(8)); save_admin({"username": "admin", "password": pwd})
+        log("INFO", f"Successfully created the admin user and the initial password is: {pwd}")
+    time.sleep(env("FAKE_ALIST_STARTUP", 0.2)); port = read_port()
+    httpd = http.server.ThreadingHTTPServer(("0.0.0.0", port), Handler); httpd.daemon_threads = True
+    log("INFO", f"start HTTP server @ 0.0.0.0:{port}")
+    threading.Thread(target=emit_logs, daemon=True).start()
+    httpd.serve_forever()
+
+def admin(args):
+    record = load_admin() or {"username": "admin", "password": ""}
+    if args[:1] == ["set"] and len(args) > 1:
+        record["password"] = args[1]; save_admin(record); log("INFO", f"set password success, new password: {args[1]}")
+    else:
+        log("INFO", "admin user's info:"); print(f"username: {record['username']}\npassword: {record['password']}")
+
+if __name__ == '__main__':
+    cmd = sys.argv[1:2]
+    if cmd == ["server"]: server()
+    elif cmd == ["admin"]: admin(sys.argv[2:])
+    else: print("usage: alist server | admin [show | set NEW_PASSWORD]"); sys.exit(2)
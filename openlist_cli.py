@@ -0,0 +1,270 @@
+# OpenList Companion 命令行 / 守护进程：无界面管理 alist，适合服务器、计划任务与开机自启
+# 只依赖 openlist_core；psutil 等在具体子命令里才导入，status 之类的查询保持冷启动足够快
+import os
+import sys
+import time
+import json
+import queue
+import signal
+import shutil
+import argparse
+import threading
+import subprocess
+from openlist_core import *
+
+DAEMON_PID = ".openlist_daemon-{}.pid"   # 每个实例一个守护进程，pid 与输出都落在程序目录下
+DAEMON_LOG = ".openlist_daemon-{}.log"
+DAEMON_TICK = 0.1        # 守护主循环收取回调 / 日志的周期 (秒)
+
+class ConsoleSink:
+    # 与 LogBuffer 同接口，直接打印到终端
+    def append(self, line): print(line, flush=True)
+
+def select_instances(names, dispatch=run_inline):
+    instances = load_instances(dispatch)
+    if not names: return instances
+    found = {i.name: i for i in instances}; missing = [n for n in names if n not in found]
+    if missing: raise SystemExit(f"❌ 未知实例: {', '.join(missing)} (已有: {', '.join(found)})")
+    return [found[n] for n in names]
+
+def read_pid(name):
+    try:
+        with open(DAEMON_PID.format(name), "r", encoding="utf-8") as f: pid = int(f.read().strip())
+    except (OSError, ValueError): return None
+    return pid if pid_alive(pid) else None
+
+def pid_alive(pid):
+    if os.name == "nt":
+        import psutil
+        return psutil.pid_exists(pid)
+    try: os.kill(pid, 0)
+    except ProcessLookupError: return False
+    except PermissionError: pass
+    return True
+
+def wait_health(port, timeout=RESTORE_HEALTH_TIMEOUT, want="running"):
+    deadline = time.monotonic() + timeout
+    while True:
+        state, _ = probe_port(port)
+        if state == want: return True
+        if time.monotonic() >= deadline: return False
+        time.sleep(PROBE_TIMEOUT)
+
+# --- 子命令 ---
+def cmd_status(args):
+    rows, instances = [], select_instances(args.instance)
+    for inst in instances:
+        state, ms = probe_port(inst.port); inst.state = state
+        rows.append({"name": inst.name, "path": inst.path, "port": inst.port, "state": state,
+                     "latency_ms": round(ms, 2) if ms is not None else None, "daemon_pid": read_pid(inst.name)})
+    if args.storages:
+        # 单轮并发探测；凭证只能取自数据库 (旧版明文)，新版 alist 需先在界面里获取一次
+        from concurrent.futures import ThreadPoolExecutor
+        prober = StorageProber(); prober.set_targets(instances)
+        with ThreadPoolExecutor(STORAGE_PROBE_WORKERS) as pool: found = prober.probe_round(pool)
+        for r in rows: r["storages"] = found.get(r["name"])
+    if args.json: print(json.dumps(rows, ensure_ascii=False))
+    else:
+        for r in rows:
+            latency = f"{r['latency_ms']:.1f}ms" if r["latency_ms"] is not None else "--"
+            daemon = f"守护进程 {r['daemon_pid']}" if r["daemon_pid"] else "无守护进程"
+            print(f"{r['name']:<16} :{r['port']:<6} {r['state']:<9} {latency:>9}  {daemon}  {r['path'] or '(未设置路径)'}")
+            if "storages" not in r or r["state"] == "stopped": continue
+            if r["storages"] is None: print("    存储: 需要管理员凭证"); continue
+            for s in r["storages"]: print(f"    {'✗' if s['last_error'] else '✓'} {s['mount']:<24} {s['summary']:<28} {s['last_error']}")
+    return 0 if all(r["state"] == "running" for r in rows) else 3
+
+def cmd_start(args):
+    code = 0
+    for inst in select_instances(args.instance):
+        if not inst.path or not os.path.isfile(inst.path): print(f"❌ [{inst.name}] 未找到 alist 可执行文件: {inst.path or '(未设置)'}"); code = 1; continue
+        if read_pid(inst.name) or probe_port(inst.port)[0] != "stopped": print(f"ℹ️ [{inst.name}] 已在运行"); continue
+        spawn_daemon(inst.name)
+        if wait_health(inst.port): print(f"🚀 [{inst.name}] 已就绪 :{inst.port}")
+        else: print(f"❌ [{inst.name}] {RESTORE_HEALTH_TIMEOUT}s 内未就绪，详见 {DAEMON_LOG.format(inst.name)}"); code = 1
+    return code
+
+def spawn_daemon(name):
+    # 以脱离终端的子进程运行 daemon 子命令，输出重定向到实例日志文件
+    cmd = [sys.executable, os.path.abspath(sys.argv[0]), "daemon", "-i", name]
+    if os.name == "nt": extra = {"creationflags": 0x00000008 | 0x00000200 | NO_WINDOW}   # DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP
+    else: extra = {"start_new_session": True}
+    with open(DAEMON_LOG.format(name), "a", encoding="utf-8") as out:
+        subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=out, stderr=subprocess.STDOUT, cwd=os.getcwd(), **extra)
+    hide_file(DAEMON_LOG.format(name))
+
+def cmd_stop(args):
+    for inst in select_instances(args.instance): stop_instance(inst)
+    return 0
+
+def stop_instance(inst):
+    # 先让守护进程自行收尾，再按完整路径兜底终止残留的 alist
+    pid = read_pid(inst.name)
+    if pid:
+        if os.name == "nt":
+            import psutil
+            psutil.Process(pid).terminate()
+        else: os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + STOP_GRACE * 2 + 1
+        while pid_alive(pid) and time.monotonic() < deadline: time.sleep(PROBE_TIMEOUT)
+    done = threading.Event(); sup = Supervisor(ConsoleSink()); sup.app_path = inst.path
+    sup.stop(then=done.set); done.wait()
+    print(f"🛑 [{inst.name}] 已停止")
+
+def cmd_restart(args):
+    cmd_stop(args); return cmd_start(args)
+
+def cmd_backup(args):
+    repo = args.repo or load_backup_repo()
+    if not repo: print("❌ 未设置备份仓库，请使用 --repo 指定"); return 2
+    if args.repo: save_backup_repo(os.path.normpath(repo))
+    code = 0
+    for inst in select_instances(args.instance):
+        if not inst.path: continue
+        code |= run_backup(inst, repo)
+    return code
+
+def run_backup(inst, repo):
+    engine, start, last = BackupEngine(inst.data_dir, os.path.join(repo, inst.name)), time.perf_counter(), [-1]
+    def report(done, total):
+        pct = int(done * 100 / total) if total else 100
+        if pct != last[0]: last[0] = pct; print(f"\r📦 [{inst.name}] 备份中 {pct}%", end="", file=sys.stderr, flush=True)
+    try: name, count, removed = engine.run(report)
+    except Exception as e: print(f"\n❌ [{inst.name}] 备份失败: {e}", file=sys.stderr); return 1
+    print(f"\r✅ [{inst.name}] 备份完成 {name[:-5]}: {count} 个文件，新增 {engine.written} 块，清理 {removed} 块，用时 {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+def cmd_restore(args):
+    instances = select_instances(args.instance)
+    if len(instances) != 1: print("❌ 恢复需要用 -i 指定唯一的实例"); return 2
+    inst = instances[0]; staging = inst.data_dir + ".staging"
+    # 1. 服务保持运行，先暂存并校验
+    print(f"📦 [{inst.name}] 正在暂存并校验备份，服务保持运行...")
+    try: stage_restore(os.path.abspath(args.source), staging)
+    except Exception as e:
+        shutil.rmtree(staging, ignore_errors=True); print(f"❌ 备份校验失败，线上数据未改动: {e}"); return 1
+    # 2. 停服并原子切换
+    stop_instance(inst)
+    try: rollback = swap_in(inst.data_dir, staging)
+    except OSError as e: print(f"❌ 切换失败，已保持原数据: {e}"); cmd_start(args); return 1
+    # 3. 拉起服务，限时内未就绪或线上数据复核不通过 (如没有管理员账号) 则回滚；确认前不删除回滚目录
+    if cmd_start(args) == 0:
+        try: check_data_dir(inst.data_dir)
+        except ValueError as e: print(f"❌ 恢复后的数据校验未通过: {e}")
+        else: shutil.rmtree(rollback, ignore_errors=True); print(f"✅ [{inst.name}] 恢复完成"); return 0
+    stop_instance(inst)
+    try: print(f"↩️ 已回滚，失败的数据保留在 {roll_back(inst.data_dir, rollback)}")
+    except OSError as e: print(f"❌ 回滚失败，原数据位于 {rollback}: {e}")
+    cmd_start(args); return 1
+
+def parse_since(text):
+    # 30m / 2h / 7d / 秒数
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    try: return float(text[:-1]) * units[text[-1]] if text[-1] in units else float(text)
+    except (ValueError, IndexError): raise argparse.ArgumentTypeError(f"无法识别的时长: {text}")
+
+def cmd_logs(args):
+    code = 1
+    for inst in select_instances(args.instance):
+        path = inst.log_path
+        if not path: print(f"ℹ️ [{inst.name}] 未开启文件日志", file=sys.stderr); continue
+        history = LogHistory(path); history.refresh()
+        lines = history.query(time.time() - args.since, LEVEL_RANK[args.level], args.grep, args.limit)
+        for line in lines: print(f"[{inst.name}] {line}")
+        if lines: code = 0
+    return code
+
+def cmd_daemon(args):
+    # 前台运行：监管进程、探测健康、转发日志、定时备份；回调统一排进主循环队列，与 GUI 的单线程模型一致
+    calls = queue.Queue(); dispatch = lambda fn, *a: calls.put((fn, a))
+    instances = select_instances(args.instance, dispatch); by_name = {i.name: i for i in instances}
+    halt = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT): signal.signal(sig, lambda *_: halt.set())
+    for inst in instances:
+        with open(DAEMON_PID.format(inst.name), "w", encoding="utf-8") as f: f.write(str(os.getpid()))
+        hide_file(DAEMON_PID.format(inst.name))
+    def log(inst, msg): print(f"[{time.strftime('%H:%M:%S')}] [{inst.name}] {msg}", flush=True)
+    def on_state(name, state):
+        inst = by_name[name]; inst.state = state; log(inst, f"状态: {state}")
+        if state == "running": inst.supervisor.mark_ready()
+    prober = ProbeScheduler(dispatch); prober.on_state = on_state
+    prober.set_targets({i.name: i.port for i in instances}); prober.start()
+    failing = {}
+    def on_storage_stats(name, rows):
+        # 只在某个存储开始 / 停止报错时记一行
+        for row in rows or ():
+            key, error = (name, row["mount"]), row["last_error"]
+            if bool(error) != bool(failing.get(key)): log(by_name[name], f"💾 {row['mount']} " + (f"异常: {error}" if error else "已恢复"))
+            failing[key] = error
+    storage_prober = StorageProber(dispatch); storage_prober.on_stats = on_storage_stats; storage_prober.set_targets(instances); storage_prober.start()
+    sampler = server = None
+    if args.metrics_port:
+        sampler = MetricsSampler(dispatch); sampler.set_targets({i.name: i.supervisor for i in instances}); sampler.start()
+        server = serve_metrics(sampler, args.metrics_port)
+    for inst in instances:
+        inst.supervisor.on_ready = lambda secs, inst=inst: log(inst, f"🚀 服务已就绪，启动耗时 {secs:.2f}s")
+        inst.supervisor.start(); inst.follow_log(); log(inst, f"▶ 已启动 {inst.path}")
+    repo = args.repo or load_backup_repo(); next_backup = time.monotonic() + AUTO_BACKUP_INTERVAL; backup = None
+
+    def pump(timeout):
+        try:
+            fn, a = calls.get(timeout=timeout)
+            while True: fn(*a); fn, a = calls.get_nowait()
+        except queue.Empty: pass
+        for inst in instances:
+            batch = inst.log_buffer.drain(f"[{time.strftime('%H:%M:%S')}] [{inst.name}] ")
+            if not batch: continue
+            print("\n".join(map(str, batch)), flush=True)
+            for rec in batch:
+                if rec.event == "initial_password": inst.raw_password = rec.value; storage_prober.poke()   # 存储探测据此登录
+
+    while not halt.is_set():
+        pump(DAEMON_TICK)
+        if repo and AUTO_BACKUP_INTERVAL and time.monotonic() >= next_backup and not (backup and backup.is_alive()):
+            next_backup = time.monotonic() + AUTO_BACKUP_INTERVAL
+            backup = threading.Thread(target=lambda: [run_backup(i, repo) for i in instances if i.path], daemon=True); backup.start()
+    # 收尾：逐个停止 alist，期间继续收取回调与日志
+    prober.stop(); storage_prober.stop()
+    if sampler: sampler.stop()
+    if server: server.shutdown()
+    left = [len(instances)]
+    def stopped(): left[0] -= 1
+    for inst in instances: inst.unfollow_log(); inst.supervisor.stop(then=stopped)
+    deadline = time.monotonic() + STOP_GRACE * 2 + 1
+    while left[0] and time.monotonic() < deadline: pump(DAEMON_TICK)
+    for inst in instances:
+        try: os.remove(DAEMON_PID.format(inst.name))
+        except OSError: pass
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="OpenList Companion", description="无界面管理 alist：不带参数运行即打开图形界面")
+    sub = parser.add_subparsers(dest="command", required=True)
+    def add(name, fn, help_text):
+        p = sub.add_parser(name, help=help_text); p.set_defaults(fn=fn)
+        p.add_argument("-i", "--instance", action="append", help="实例名，可重复；默认全部实例")
+        return p
+    add("start", cmd_start, "在后台守护进程中启动 alist 并等待就绪")
+    add("stop", cmd_stop, "停止守护进程与 alist")
+    add("restart", cmd_restart, "重启")
+    p = add("status", cmd_status, "查看运行状态，全部就绪时退出码为 0"); p.add_argument("--json", action="store_true", help="输出 JSON")
+    p.add_argument("--storages", action="store_true", help="同时并发探测各实例挂载的存储")
+    add("backup", cmd_backup, "增量备份到仓库").add_argument("--repo", help="备份仓库目录，指定后会记住")
+    p = add("restore", cmd_restore, "从快照 (.json) 或 zip 恢复，失败自动回滚"); p.add_argument("source", help="快照清单或 zip 文件")
+    p = add("logs", cmd_logs, "按索引查询 alist 日志文件历史，有结果时退出码为 0")
+    p.add_argument("--since", type=parse_since, default=LOG_ERROR_WINDOW, help="回看时长，如 30m / 2h / 7d，默认 1h")
+    p.add_argument("--level", choices=[k for k in LEVEL_RANK if k != "panic"], default="error", help="最低级别，默认 error")
+    p.add_argument("--grep", help="正则过滤")
+    p.add_argument("--limit", type=int, default=LOG_QUERY_LIMIT, help="最多输出最近多少行")
+    p = add("daemon", cmd_daemon, "前台运行守护进程 (供 systemd / 计划任务使用)")
+    p.add_argument("--metrics-port", type=int, default=METRICS_PORT, help="在 127.0.0.1 上提供 /metrics")
+    p.add_argument("--repo", help="定时自动备份使用的仓库目录")
+    return parser
+
+def main(argv=None):
+    if hasattr(sys.stdout, "reconfigure"): sys.stdout.reconfigure(errors="replace"); sys.stderr.reconfigure(errors="replace")
+    args = build_parser().parse_args(argv)
+    return args.fn(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
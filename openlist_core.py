@@ -0,0 +1,1110 @@
+# OpenList Companion 无界面核心：进程监管、日志采集、健康探测、资源采样、备份 / 恢复与凭证
+# GUI 与 CLI / 守护进程共用；这里不引入 PyQt5 / requests，重依赖一律在用到时再导入
+import os
+import sys
+import re
+import json
+import time
+import socket
+import shutil
+import hashlib
+import zlib
+import threading
+import subprocess
+from array import array
+from collections import deque
+
+# 供 GUI / CLI / 基准 `from openlist_core import *` 使用的公开名字；标准库模块不在其列，各自显式导入
+__all__ = (
+    "CONFIG_FILE", "BACKUP_REPO_FILE", "INSTANCES_FILE", "DEFAULT_PORT", "ALIST_NAMES", "NO_WINDOW", "LOG_CAPACITY", "PROBE_INTERVAL",
+    "PROBE_TIMEOUT", "PROBE_IDLE_INTERVAL", "PROBE_SETTLE", "LATENCY_BUCKETS", "LATENCY_WINDOW", "STOP_GRACE", "RESTART_POLICY", "RESTART_BACKOFF",
+    "RESTART_STABLE", "RESTART_SKIP_EVENTS", "BACKUP_CHUNK_SIZE", "BACKUP_EXCLUDE", "BACKUP_KEEP_LAST", "BACKUP_KEEP_DAILY", "ADMIN_API_TIMEOUT", "ADMIN_ROLE",
+    "RESTORE_HEALTH_TIMEOUT", "AUTO_BACKUP_INTERVAL", "METRICS_INTERVAL", "METRICS_HISTORY", "METRICS_PORT", "ASSET_CACHE_DIR", "ASSET_TTL",
+    "ASSET_TIMEOUT", "LOG_INDEX_DIR", "LOG_INDEX_STRIDE", "LOG_READ_CHUNK", "LOG_REPLAY_BYTES", "LOG_HEAD_BYTES", "LOG_POLL_INTERVAL", "LOG_QUERY_LIMIT",
+    "LOG_ERROR_WINDOW", "STORAGE_PROBE_INTERVAL", "STORAGE_PROBE_WORKERS", "STORAGE_PROBE_TIMEOUT", "STORAGE_PROBE_REFRESH", "STORAGE_LIST_TTL",
+    "STORAGE_WINDOW", "STORAGE_LATENCY_BUCKETS", "ANSI_RE", "LOG_WORD_RE", "LOG_HEAD_RE", "LOG_LEVELS", "LEVEL_RANK", "LOG_RULES", "SPARK_CHARS",
+    "METRICS", "BASE_DIR",
+    "hide_file", "run_inline", "LogRecord", "LogParser", "LogBuffer", "LatencyHistogram", "probe_port", "ProbeTarget", "RingSeries", "sparkline",
+    "format_metric", "MetricsSampler", "serve_metrics", "ProbeScheduler", "LogReader", "read_log_path", "inotify_watch", "LogClock", "LogIndex",
+    "index_stream", "LogTailer", "LogHistory", "Supervisor", "BackupEngine", "stage_zip", "stage_restore", "check_data_dir", "swap_in", "roll_back", "http_session",
+    "AssetCache", "StartupProfile", "AdminAuthError", "AdminClient", "StorageStats", "StorageProber", "read_admin_from_db", "read_port", "Instance",
+    "auto_find_path", "load_instances", "save_instances", "load_backup_repo", "save_backup_repo",
+)
+
+# --- 核心配置 ---
+CONFIG_FILE = ".openlist_path"
+BACKUP_REPO_FILE = ".openlist_backup"
+INSTANCES_FILE = ".openlist_instances"
+DEFAULT_PORT = 5244
+ALIST_NAMES = ("alist.exe", "alist")
+NO_WINDOW = 0x08000000 if os.name == "nt" else 0   # CREATE_NO_WINDOW，仅 Windows 有效
+LOG_CAPACITY = 5000      # 日志环形缓冲 / 视图最大行数
+PROBE_INTERVAL = 1.0     # 健康探测周期 (秒)
+PROBE_TIMEOUT = 0.5      # 单次 TCP / HTTP 探测超时
+PROBE_IDLE_INTERVAL = 5.0    # 状态稳定后的降频探测周期 (秒)
+PROBE_SETTLE = 10.0      # 状态切换 / 手动唤醒后保持高频探测的时长 (秒)
+LATENCY_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)  # ms，最后一档之外记为溢出
+LATENCY_WINDOW = 300     # 延迟直方图滚动窗口 (样本数)
+STOP_GRACE = 3.0         # terminate 后等待退出的宽限期，超时升级为 kill
+RESTART_POLICY = "on-failure"   # never / on-failure / always
+RESTART_BACKOFF = (1, 30)       # 崩溃自动重启的退避区间 (秒)，按 2 倍递增
+RESTART_STABLE = 60      # 稳定运行超过该时长后退避清零
+RESTART_SKIP_EVENTS = ("port_in_use",)   # 退出前日志出现这些事件时不自动重启：重启也只会同样失败 (如端口已被另一个 alist 占用)
+BACKUP_CHUNK_SIZE = 4 * 1024 * 1024   # 定长分块，按内容 sha256 去重
+BACKUP_EXCLUDE = ("temp", "log", "data.db-wal", "data.db-shm", "data.db-journal")
+BACKUP_KEEP_LAST = 24    # 保留最近 N 份快照
+BACKUP_KEEP_DAILY = 30   # 另外每天保留最后一份，共 N 天
+ADMIN_API_TIMEOUT = 3    # 凭证 HTTP API 超时 (秒)
+ADMIN_ROLE = 2           # alist x_users.role 中的管理员
+RESTORE_HEALTH_TIMEOUT = 30  # 恢复切换后等待服务就绪的时限 (秒)，超时自动回滚
+AUTO_BACKUP_INTERVAL = 3600  # 已设置备份仓库时的自动备份周期 (秒)，0 为关闭
+METRICS_INTERVAL = 2.0   # 进程资源采样周期 (秒)
+METRICS_HISTORY = 300    # 每项指标保留的样本数 (环形)
+METRICS_PORT = 0         # >0 时在 127.0.0.1 上提供 Prometheus 文本格式 /metrics
+ASSET_CACHE_DIR = ".openlist_cache"   # 远程资源 (头像等) 的磁盘缓存目录
+ASSET_TTL = 7 * 86400    # 缓存新鲜期 (秒)，过期后带 ETag / Last-Modified 条件请求重新验证
+ASSET_TIMEOUT = (2, 5)   # 远程资源 (连接, 读取) 超时 (秒)
+LOG_INDEX_DIR = ".companion-index"   # 建在 alist 日志目录下的历史索引
+LOG_INDEX_STRIDE = 64 * 1024   # 时间索引的采样间隔 (字节)，另外每分钟至少一个点
+LOG_READ_CHUNK = 1024 * 1024   # 跟随 / 补建索引时的单次读取量
+LOG_REPLAY_BYTES = 256 * 1024  # 首次接入时推送到日志视图的文件末尾长度，更早的只建索引
+LOG_HEAD_BYTES = 64            # 文件开头指纹长度：copytruncate 截断后又写过旧偏移时，靠它发现内容已换
+LOG_POLL_INTERVAL = 1.0        # 无 inotify 时轮询日志文件的周期 (秒)
+LOG_QUERY_LIMIT = 2000         # 历史查询最多返回的行数
+LOG_ERROR_WINDOW = 3600        # "最近错误" 回看时长 (秒)
+STORAGE_PROBE_INTERVAL = 30    # 存储探测周期 (秒)
+STORAGE_PROBE_WORKERS = 256    # 存储探测并发上限 (线程池与 HTTP 连接池)；线程与连接都按需创建，实际并发即挂载数，一轮约等于最慢的单个存储
+STORAGE_PROBE_TIMEOUT = 10     # 单个存储 fs/list 超时 (秒)，慢存储只拖住自己那一路
+STORAGE_PROBE_REFRESH = 3600   # 每个存储隔多久 (秒) 用一次带 refresh 的 fs/list 强制回源，0 为从不；平时走 alist 目录缓存，不让网盘 / SMB / S3 每轮都重新列根目录
+STORAGE_LIST_TTL = 300         # 存储列表缓存时长 (秒)
+STORAGE_WINDOW = 50            # 每个存储保留的最近样本数
+STORAGE_LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)  # ms，网盘 / SMB 比本机 /ping 慢得多
+ANSI_RE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+LOG_WORD_RE = re.compile(r"\w+")   # 触发词分词：按单词切，"locked." / "failed:" 之类带标点的也能命中
+# 行首：logrus 的 INFO[时间]、gin 访问日志、Go 标准 log 时间戳，后面可带 [模块]
+LOG_HEAD_RE = re.compile(r"(?:(?P<level>[A-Z]{4})\[(?P<time>[^\]]*)\]|\[(?P<gin>GIN)\] (?P<gin_time>[\d/]+ - [\d:]+) \||(?P<std_time>\d{4}/\d\d/\d\d \d\d:\d\d:\d\d))\s*(?:\[(?P<module>[\w./-]+)\]\s*)?")
+LOG_LEVELS = {"TRAC": "trace", "DEBU": "debug", "INFO": "info", "WARN": "warn", "ERRO": "error", "FATA": "fatal", "PANI": "panic"}
+LEVEL_RANK = {"trace": 0, "debug": 1, "info": 2, "warn": 3, "error": 4, "fatal": 5, "panic": 5}
+LOG_RULES = (  # (事件名, 触发词, 正则, 命中时提升到的级别)；触发词须作为完整单词出现 (两侧标点不计)，正则至多一个捕获组作为事件值
+    ("initial_password", "password", r"initial password is:\s*(\S+)", None),
+    ("ready", "server", r"start HTTPS? server @\s*(\S+)", None),
+    ("port_in_use", "address", r"address already in use|Only one usage of each socket address", "fatal"),
+    ("storage_failed", "failed", r"failed (?:to )?init(?:ialize)? storage\S*:?\s*(.*)", "error"),
+    ("db_locked", "locked", r"database is locked", "error"),
+    ("panic", "panic", r"^panic:\s*(.*)", "panic"),
+)
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+METRICS = (  # (键名, 面板标签, Prometheus 指标名, 说明)
+    ("cpu", "CPU ", "alist_cpu_percent", "CPU usage percent of the alist process"),
+    ("rss", "内存", "alist_memory_rss_bytes", "Resident set size in bytes"),
+    ("io", "I/O ", "alist_io_bytes_per_second", "Read + write bytes per second"),
+    ("handles", "句柄", "alist_open_handles", "Open file handles / descriptors"),
+    ("conns", "连接", "alist_connections", "Open network connections"),
+    ("threads", "线程", "alist_threads", "Number of threads"),
+)
+
+# --- 路径感应 ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def hide_file(path):
+    try:
+        if os.path.exists(path):
+            import ctypes
+            ctypes.windll.kernel32.SetFileAttributesW(path, 2)
+    except: pass
+
+def run_inline(fn, *args): fn(*args)
+
+class LogRecord:
+    # 一行日志解析一次：显示文本已去掉 ANSI，结构化字段供过滤、事件与索引使用
+    __slots__ = ("stamp", "text", "time", "level", "module", "message", "event", "value")
+    def __init__(self, text, time="", level="info", module="", message=None, event=None, value=None):
+        self.stamp = ""; self.text = text; self.time = time; self.level = level; self.module = module
+        self.message = text if message is None else message; self.event = event; self.value = value
+    def __str__(self): return self.stamp + self.text
+
+class LogParser:
+    # 规则按触发词预编译建索引：每行只做 去 ANSI → 行首匹配 → 分词与触发词集合求交，
+    # 只有含触发词的行才跑对应规则的正则，单行开销与规则条数无关
+    # 有状态：没有行首的续行 (堆栈等) 沿用上一行的级别；一行命中多个触发词时按规则表顺序取第一个命中的规则
+    def __init__(self, rules=LOG_RULES):
+        self.rules = {}
+        for order, (name, word, pattern, level) in enumerate(rules): self.rules.setdefault(word, []).append((order, name, re.compile(pattern), level))
+        self.words = frozenset(self.rules); self.last_level = "info"
+    def parse(self, raw):
+        text = ANSI_RE.sub("", raw) if "\x1b" in raw else raw
+        head = LOG_HEAD_RE.match(text)
+        if head:
+            g = head.group
+            level = LOG_LEVELS.get(g("level"), "info") if g("level") else "info"
+            stamp, module, message = g("time") or g("gin_time") or g("std_time"), g("module") or ("gin" if g("gin") else ""), text[head.end():]
+        else: level, stamp, module, message = self.last_level, "", "", text
+        rec = LogRecord(text, stamp, level, module, message)
+        words = self.words.intersection(LOG_WORD_RE.findall(message))
+        if not words: candidates = ()
+        elif len(words) == 1: candidates = self.rules[next(iter(words))]
+        else: candidates = sorted(r for word in words for r in self.rules[word])   # 集合无序，按规则序号排，命中结果不随哈希种子变化
+        for _, name, rule, raise_to in candidates:
+            hit = rule.search(message)
+            if not hit: continue
+            rec.event = name; rec.value = hit.group(1) if rule.groups else None
+            if raise_to and LEVEL_RANK[raise_to] >= LEVEL_RANK[level]: rec.level = raise_to
+            break
+        self.last_level = rec.level
+        return rec
+
+class LogBuffer:
+    # 采集线程只管 append，GUI 定时 drain 一整批；两端都是定长 deque，内存恒定
+    # 元素是 LogRecord；伴侣自身的提示以字符串传入，按 companion 模块记一条 info
+    def __init__(self, capacity=LOG_CAPACITY):
+        self.lines = deque(maxlen=capacity); self.pending = deque(maxlen=capacity)
+    def append(self, line): self.pending.append(line if isinstance(line, LogRecord) else LogRecord(line, module="companion"))
+    def drain(self, stamp=""):
+        batch, pop = [], self.pending.popleft
+        try:
+            while True: rec = pop(); rec.stamp = stamp; batch.append(rec)
+        except IndexError: pass
+        self.lines.extend(batch); return batch
+
+class LatencyHistogram:
+    # 定长分桶直方图：窗口内只存桶下标，增删样本都是 O(1)
+    def __init__(self, window=LATENCY_WINDOW, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets; self.samples = deque(maxlen=window); self.counts = [0] * (len(buckets) + 1)
+    def add(self, ms):
+        idx = next((i for i, b in enumerate(self.buckets) if ms <= b), len(self.buckets))
+        if len(self.samples) == self.samples.maxlen: self.counts[self.samples[0]] -= 1
+        self.samples.append(idx); self.counts[idx] += 1
+    def percentile(self, q):
+        if not self.samples: return None
+        need, seen = q * len(self.samples), 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= need: return self.buckets[i] if i < len(self.buckets) else None
+        return None
+    def fmt(self, q):
+        v = self.percentile(q)
+        return f"≤{v}ms" if v is not None else f">{self.buckets[-1]}ms"
+    def summary(self):
+        if not self.samples: return "⏱ 延迟: --"
+        return f"⏱ p50 {self.fmt(0.5)} · p95 {self.fmt(0.95)}"
+
+def probe_port(port):
+    # TCP 连通 + HTTP /ping；返回 (状态, 往返耗时 ms)
+    # 同一连接上手写一个最小的 HTTP/1.0 请求，只看状态行，省去 http.client 的导入与二次建连
+    start = time.perf_counter()
+    try: sock = socket.create_connection(("127.0.0.1", port), timeout=PROBE_TIMEOUT)
+    except OSError: return "stopped", None
+    try:
+        with sock:
+            sock.sendall(b"GET /ping HTTP/1.0\r\nHost: 127.0.0.1\r\n\r\n")
+            reply = b""
+            while len(reply) < 4096:   # HTTP/1.0 由服务端关闭连接；读完再关，避免 RST
+                data = sock.recv(4096)
+                if not data: break
+                reply += data
+            head = reply.split(b"\r\n", 1)[0].split()
+        ok = len(head) >= 2 and head[1] == b"200"
+    except OSError: ok = False
+    return ("running" if ok else "degraded"), (time.perf_counter() - start) * 1000
+
+class ProbeTarget:
+    def __init__(self, port): self.port = port; self.state = None; self.summary = None; self.due = 0.0; self.changed_at = 0.0; self.histogram = LatencyHistogram()
+
+class RingSeries:
+    # 定长 array('d') 环形时间序列：写入 O(1)，不为每个样本创建对象
+    def __init__(self, size=METRICS_HISTORY): self.size = size; self.data = array('d', bytes(8 * size)); self.head = 0; self.count = 0
+    def push(self, v): self.data[self.head] = v; self.head = (self.head + 1) % self.size; self.count = min(self.count + 1, self.size)
+    def last(self): return self.data[self.head - 1] if self.count else 0.0
+    def tail(self, n):
+        n = min(n, self.count); return [self.data[(self.head - n + i) % self.size] for i in range(n)]
+
+def sparkline(values):
+    if not values: return ""
+    lo, hi = min(values), max(values); span = (hi - lo) or 1.0
+    return "".join(SPARK_CHARS[int((v - lo) / span * (len(SPARK_CHARS) - 1))] for v in values)
+
+def format_metric(key, v):
+    if key == "cpu": return f"{v:.1f}%"
+    if key in ("rss", "io"):
+        for unit in ("B", "KB", "MB", "GB"):
+            if v < 1024 or unit == "GB": return f"{v:.0f} {unit}" if unit == "B" else f"{v:.1f} {unit}"
+            v /= 1024
+    return f"{v:.0f}"
+
+class MetricsSampler(threading.Thread):
+    # 定时采样受监管 alist 进程的资源占用，写入各实例的环形序列；自身 CPU 开销单独统计
+    def __init__(self, dispatch=run_inline):
+        super().__init__(daemon=True); self.dispatch = dispatch; self.on_sampled = None
+        self.targets = {}; self.series = {}; self.procs = {}; self.io_last = {}
+        self.lock = threading.Lock(); self._halt = threading.Event(); self.cost = 0.0; self.started = time.monotonic()
+    def set_targets(self, supervisors):
+        with self.lock:
+            self.targets = dict(supervisors)
+            for name in supervisors: self.series.setdefault(name, {key: RingSeries() for key, *_ in METRICS})
+            for name in list(self.series):
+                if name not in supervisors: del self.series[name]; self.procs.pop(name, None); self.io_last.pop(name, None)
+    def overhead(self):
+        # 采样线程累计 CPU 时间 / 墙钟时间，即占用单核的百分比
+        return self.cost / max(time.monotonic() - self.started, 1e-6) * 100
+    def sample(self, name, sup):
+        import psutil
+        proc = sup.process if sup.is_running() else None
+        cached = self.procs.get(name)
+        if proc is None: self.procs.pop(name, None); return None
+        if cached is None or cached.pid != proc.pid: cached = self.procs[name] = psutil.Process(proc.pid); cached.cpu_percent(None); self.io_last.pop(name, None)
+        with cached.oneshot():
+            row = {"cpu": cached.cpu_percent(None), "rss": cached.memory_info().rss, "threads": cached.num_threads()}
+            row["handles"] = cached.num_handles() if hasattr(cached, "num_handles") else cached.num_fds()
+            try:
+                io = cached.io_counters(); total, now = io.read_bytes + io.write_bytes, time.monotonic(); last = self.io_last.get(name)
+                row["io"] = (total - last[0]) / (now - last[1]) if last and now > last[1] else 0.0; self.io_last[name] = (total, now)
+            except (AttributeError, psutil.AccessDenied): row["io"] = 0.0
+        conns = getattr(cached, "net_connections", None) or cached.connections
+        row["conns"] = len(conns(kind="inet"))
+        return row
+    def run(self):
+        import psutil
+        while not self._halt.is_set():
+            t0 = time.thread_time()
+            with self.lock: targets = list(self.targets.items())
+            for name, sup in targets:
+                try: row = self.sample(name, sup)
+                except (psutil.Error, OSError): row = None
+                series = self.series.get(name)
+                if not series: continue
+                for key, *_ in METRICS: series[key].push(row[key] if row else 0.0)
+            self.cost += time.thread_time() - t0
+            if self.on_sampled: self.dispatch(self.on_sampled)
+            self._halt.wait(METRICS_INTERVAL)
+    def stop(self):
+        self._halt.set()
+        if self.is_alive(): self.join()
+    def render_prometheus(self):
+        out = []
+        with self.lock: series = dict(self.series)
+        for key, _, metric, help_text in METRICS:
+            out += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            for name, s in series.items():
+                label = name.replace("\\", "\\\\").replace('"', '\\"'); v = s[key].last()
+                # 字节 / 计数类取整输出，其余用 repr 保留完整精度 (:g 只有 6 位有效数字，大字节数会被截断)
+                out.append(f'{metric}{{instance="{label}"}} {int(v) if v.is_integer() else repr(v)}')
+        out += ["# HELP openlist_companion_sampler_overhead_percent CPU used by the sampler, percent of one core",
+                "# TYPE openlist_companion_sampler_overhead_percent gauge", f"openlist_companion_sampler_overhead_percent {self.overhead():.4f}"]
+        return "\n".join(out) + "\n"
+
+def serve_metrics(sampler, port=METRICS_PORT):
+    # 可选的本地 Prometheus 抓取端点，仅监听回环地址
+    import http.server
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics": self.send_error(404); return
+            body = sampler.render_prometheus().encode("utf-8")
+            self.send_response(200); self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
+        def log_message(self, *args): pass
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler); server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class ProbeScheduler(threading.Thread):
+    # 所有实例共用一个探测线程：按到期时间轮询，状态稳定的实例自动降频；只在状态切换时回调
+    def __init__(self, dispatch=run_inline):
+        super().__init__(daemon=True); self.dispatch = dispatch
+        self.on_state = None     # on_state(实例名, running / degraded / stopped)
+        self.on_latency = None   # on_latency(实例名, 延迟摘要)
+        self.targets = {}; self.lock = threading.Lock()
+        self._wake = threading.Event(); self._halt = threading.Event()
+    def set_targets(self, ports):
+        # ports: {实例名: 端口}；端口未变的实例保留原有状态与直方图
+        with self.lock:
+            old = self.targets
+            self.targets = {name: old[name] if name in old and old[name].port == port else ProbeTarget(port) for name, port in ports.items()}
+        self._wake.set()
+    def poke(self, name):
+        with self.lock:
+            t = self.targets.get(name)
+            if t: t.due = 0.0; t.changed_at = time.monotonic()
+        self._wake.set()
+    def run(self):
+        while not self._halt.is_set():
+            self._wake.clear(); now = time.monotonic()
+            with self.lock: due = [(n, t) for n, t in self.targets.items() if t.due <= now]
+            for name, t in due:
+                state, ms = probe_port(t.port); now = time.monotonic()
+                if ms is not None: t.histogram.add(ms)
+                if state != t.state:
+                    t.state = state; t.changed_at = now
+                    if self.on_state: self.dispatch(self.on_state, name, state)
+                summary = t.histogram.summary()
+                if summary != t.summary:
+                    t.summary = summary
+                    if self.on_latency: self.dispatch(self.on_latency, name, summary)
+                t.due = now + (PROBE_INTERVAL if now - t.changed_at < PROBE_SETTLE else PROBE_IDLE_INTERVAL)
+            with self.lock: nxt = min((t.due for t in self.targets.values()), default=now + PROBE_IDLE_INTERVAL)
+            self._wake.wait(max(0.0, nxt - time.monotonic()))
+    def stop(self):
+        self._halt.set(); self._wake.set()
+        if self.is_alive(): self.join()
+
+class LogReader(threading.Thread):
+    # 逐行读取 alist 输出写入 LogBuffer，由界面 / 守护进程按批取走；就绪与退出经 dispatch 通知 Supervisor
+    def __init__(self, supervisor, process, generation):
+        super().__init__(daemon=True); self.supervisor, self.process, self.generation = supervisor, process, generation
+    def run(self):
+        sup = self.supervisor; push, parse, waiting, fatal = sup.sink.append, LogParser().parse, True, None
+        for line in iter(self.process.stdout.readline, ''):
+            line = line.strip()
+            if not line: continue
+            rec = parse(line); push(rec)
+            if waiting and rec.event == "ready": waiting = False; sup.dispatch(sup._on_ready_seen, self.generation)
+            if rec.event in RESTART_SKIP_EVENTS: fatal = rec
+        self.process.stdout.close()
+        sup.dispatch(sup._on_exited, self.generation, self.process.wait(), fatal)
+
+def read_log_path(app_path):
+    # alist 在 data/config.json 的 log 段配置文件日志，name 相对于程序目录；关闭文件日志时返回空
+    base = os.path.dirname(app_path) if app_path else ""
+    if not base: return ""
+    try:
+        with open(os.path.join(base, "data", "config.json"), "r", encoding="utf-8") as f: conf = json.load(f).get("log") or {}
+    except: conf = {}
+    if conf.get("enable") is False: return ""
+    return os.path.normpath(os.path.join(base, conf.get("name") or os.path.join("data", "log", "log.log")))
+
+def inotify_watch(directory):
+    # Linux 下用 inotify 监听日志目录，返回可 select 的 fd；其他平台或失败时返回 None，调用方退回轮询
+    if not sys.platform.startswith("linux") or not os.path.isdir(directory): return None
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0: return None
+        # IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(fd, os.fsencode(directory), 0x002 | 0x040 | 0x080 | 0x100 | 0x200) < 0: os.close(fd); return None
+        return fd
+    except (OSError, AttributeError): return None
+
+class LogClock:
+    # "2006-01-02 15:04:05" → epoch 秒；同一秒的行复用上次结果，没有时间的行沿用上一行
+    def __init__(self): self.key = None; self.value = 0
+    def __call__(self, stamp):
+        key = stamp[:19]
+        if not key or key == self.key: return self.value
+        try: self.value = int(time.mktime(time.strptime(key.replace("T", " "), "%Y-%m-%d %H:%M:%S"))); self.key = key
+        except ValueError: pass
+        return self.value
+
+def _bisect(arr, width, col, value):
+    # arr 为按行展开的定宽记录，返回第 col 列首个 >= value 的记录序号
+    lo, hi = 0, len(arr) // width
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if arr[mid * width + col] < value: lo = mid + 1
+        else: hi = mid
+    return lo
+
+class LogIndex:
+    # 单个日志文件的磁盘索引，按 inode 命名，轮转改名后仍能对上；全部只追加
+    #   <inode>.time  稀疏 (时间, 偏移)：每 LOG_INDEX_STRIDE 字节或每分钟一个点
+    #   <inode>.lvl   warn 及以上每一行的 (级别, 时间, 偏移)
+    #   <inode>.json  已建索引到的偏移 (即跟随读取的续读位置) 与文件开头指纹
+    def __init__(self, root, ino):
+        self.root = root; self.base = os.path.join(root, str(ino)); self.times = array('q'); self.levels = array('q')
+        try:
+            with open(self.base + ".json", "r", encoding="utf-8") as f: state = json.load(f)
+        except: state = {}
+        self.offset = state.get("offset", 0); self.mark = state.get("mark", [-LOG_INDEX_STRIDE, 0]); self.head = state.get("head", "")
+    def add(self, ts, rank, offset):
+        if offset - self.mark[0] >= LOG_INDEX_STRIDE or ts - self.mark[1] >= 60: self.times.extend((ts, offset)); self.mark = [offset, ts]
+        if rank >= LEVEL_RANK["warn"]: self.levels.extend((rank, ts, offset))
+    def flush(self, offset):
+        os.makedirs(self.root, exist_ok=True)
+        for suffix, pending in ((".time", self.times), (".lvl", self.levels)):
+            if not pending: continue
+            with open(self.base + suffix, "ab") as f: pending.tofile(f)
+            del pending[:]
+        with open(self.base + ".json.tmp", "w", encoding="utf-8") as f: json.dump({"offset": offset, "mark": self.mark, "head": self.head}, f)
+        os.replace(self.base + ".json.tmp", self.base + ".json"); self.offset = offset
+    def reset(self):
+        for suffix in (".time", ".lvl", ".json"):
+            try: os.remove(self.base + suffix)
+            except OSError: pass
+        self.offset = 0; self.mark = [-LOG_INDEX_STRIDE, 0]; self.head = ""; del self.times[:]; del self.levels[:]
+    def same_head(self, f):
+        # 对比文件开头与记下的指纹 (两者较短的长度内)，并更新指纹；同 inode 同名但开头变了，说明被截断后重写
+        f.seek(0); head = f.read(LOG_HEAD_BYTES); known = bytes.fromhex(self.head); n = min(len(head), len(known))
+        if self.offset and head[:n] != known[:n]: return False
+        self.head = head.hex(); return True
+    def load(self, suffix, width):
+        # 只取完整记录，容忍写到一半的尾部
+        arr = array('q')
+        try:
+            with open(self.base + suffix, "rb") as f: data = f.read()
+        except OSError: return arr
+        arr.frombytes(data[:len(data) // (8 * width) * 8 * width]); return arr
+
+def index_stream(f, index, parser, clock, emit=None, emit_from=0):
+    # 从 f 的当前位置读到末尾，只处理完整的行：建索引，emit 不为空时推送 emit_from 之后的记录
+    while True:
+        start = f.tell(); chunk = f.read(LOG_READ_CHUNK)
+        if not chunk: return
+        end = chunk.rfind(b"\n") + 1
+        if not end:
+            if len(chunk) < LOG_READ_CHUNK: f.seek(start); return   # 半行，等写完
+            end = len(chunk)   # 超长的单行强行切断
+        f.seek(start + end); pos = start
+        for raw in chunk[:end].split(b"\n"):
+            line = raw.decode("utf-8", "replace").rstrip("\r")
+            if line:
+                rec = parser.parse(line); index.add(clock(rec.time), LEVEL_RANK[rec.level], pos)
+                if emit and pos >= emit_from: emit(rec)
+            pos += len(raw) + 1
+        index.flush(start + end)
+
+class LogTailer(threading.Thread):
+    # 跟随 alist 自己写的日志文件：inotify (Linux) 或轮询等待新内容，从持久化的偏移续读，
+    # inode 变化视为轮转 (按 inode 找到改名后的旧文件读完剩余部分再切换)，变小视为截断；live() 为真时才推送到日志视图
+    # 每次唤醒现开现关，不长期占用句柄：Windows 上被打开的文件无法改名，否则会挡住 alist 的日志轮转与恢复时的 data 目录切换
+    def __init__(self, path, sink, live=lambda: True):
+        super().__init__(daemon=True); self.path, self.sink, self.live = path, sink, live
+        self.root = os.path.join(os.path.dirname(path), LOG_INDEX_DIR); self._halt = threading.Event()
+    def emit(self, rec):
+        if self.live(): self.sink.append(rec)
+    def run(self):
+        ino = index = None; parser, clock, watch, emit_from = LogParser(), LogClock(), None, 0
+        try:
+            while not self._halt.is_set():
+                watch = watch if watch is not None else inotify_watch(os.path.dirname(self.path))
+                try: st = os.stat(self.path)
+                except OSError: st = None
+                if ino is not None and (st is None or st.st_ino != ino):
+                    old = self.find(ino); ino = None
+                    if old and self.read(old, index, parser, clock, emit_from): emit_from = 0
+                if ino is None and st:
+                    ino, index = st.st_ino, LogIndex(self.root, st.st_ino)
+                    if st.st_size < index.offset: index.reset()
+                    # 首次接入大文件时只把末尾一段推到视图，更早的内容只建索引
+                    emit_from = max(index.offset, st.st_size - LOG_REPLAY_BYTES)
+                elif ino is not None and st.st_size < index.offset: index.reset(); emit_from = 0
+                # 读过一次后此前内容都已推送，之后只按偏移续读
+                if ino is not None and st.st_size > index.offset and self.read(self.path, index, parser, clock, emit_from): emit_from = 0
+                self.wait(watch)
+        except OSError as e: self.sink.append(f"❌ 日志文件跟随中断: {e}")
+        finally:
+            if watch is not None: os.close(watch)
+    def read(self, path, index, parser, clock, emit_from):
+        # 改名 / 删除的瞬间打不开时跳过，下次唤醒再读；读到了返回 True
+        try: f = open(path, "rb")
+        except (FileNotFoundError, PermissionError): return False
+        with f:
+            if not index.same_head(f):
+                # 开头变了 (copytruncate 后又写过旧偏移)：从头重建，推送范围同样不超过末尾 LOG_REPLAY_BYTES
+                index.reset(); index.same_head(f); emit_from = min(emit_from, max(0, os.fstat(f.fileno()).st_size - LOG_REPLAY_BYTES))
+            f.seek(index.offset); index_stream(f, index, parser, clock, self.emit, emit_from)
+        return True
+    def find(self, ino):
+        # 轮转后的旧文件 (log-<时间>.log)；已被压缩或删除时返回 None
+        try:
+            with os.scandir(os.path.dirname(self.path)) as it:
+                for entry in it:
+                    if entry.is_file() and entry.inode() == ino: return entry.path
+        except OSError: pass
+        return None
+    def wait(self, watch):
+        if watch is None: self._halt.wait(LOG_POLL_INTERVAL); return
+        import select
+        if select.select([watch], [], [], LOG_POLL_INTERVAL)[0]:
+            try:
+                while os.read(watch, 4096): pass
+            except BlockingIOError: pass
+    def stop(self):
+        self._halt.set()
+        if self.is_alive(): self.join()
+
+class LogHistory:
+    # 基于索引查询历史日志：按时间 / 级别二分定位偏移，再经 mmap 只读出命中的行；
+    # 索引尚未覆盖的尾部 (没有跟随线程时) 逐行扫描补齐
+    def __init__(self, path): self.path = path; self.dir = os.path.dirname(path); self.root = os.path.join(self.dir, LOG_INDEX_DIR)
+    def files(self):
+        # 当前文件与 lumberjack 轮转出的未压缩备份 (log-<时间>.log)，按修改时间排序
+        stem, ext = os.path.splitext(os.path.basename(self.path)); found = []
+        try: names = os.listdir(self.dir)
+        except OSError: return []
+        for n in names:
+            if n.startswith(stem) and n.endswith(ext):
+                st = os.stat(os.path.join(self.dir, n)); found.append((st.st_mtime, os.path.join(self.dir, n), st))
+        return sorted(found)
+    def refresh(self):
+        # 轮转出的文件不再变化，补建一次索引即可；当前文件由 LogTailer 负责；同时清理已不存在文件的索引
+        files = self.files(); live = {str(st.st_ino) for *_, st in files}
+        for _, path, st in files:
+            if path == self.path: continue
+            index = LogIndex(self.root, st.st_ino)
+            if index.offset < st.st_size:
+                with open(path, "rb") as f: f.seek(index.offset); index_stream(f, index, LogParser(), LogClock())
+        try: names = os.listdir(self.root)
+        except OSError: return
+        for n in names:
+            if n.split(".")[0] not in live: os.remove(os.path.join(self.root, n))
+    def query(self, since=0, min_rank=0, pattern=None, limit=LOG_QUERY_LIMIT):
+        # 返回 since 之后、级别不低于 min_rank 且匹配 pattern 的行 (时间顺序，至多最近 limit 条)
+        import mmap
+        rx = re.compile(pattern.encode("utf-8") if isinstance(pattern, str) else pattern) if pattern else None
+        found = deque(maxlen=limit)
+        for mtime, path, st in self.files():
+            if mtime < since or not st.st_size: continue
+            index = LogIndex(self.root, st.st_ino); indexed = min(index.offset, st.st_size)
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if min_rank >= LEVEL_RANK["warn"] and rx is None:
+                    levels = index.load(".lvl", 3)
+                    for i in range(_bisect(levels, 3, 1, since), len(levels) // 3):
+                        if levels[i * 3] >= min_rank: found.append(self.line_at(mm, levels[i * 3 + 2]))
+                    start = indexed
+                else:
+                    times = index.load(".time", 2); i = _bisect(times, 2, 0, since)
+                    start = times[(i - 1) * 2 + 1] if i else 0
+                    if start < indexed: self.scan(mm, start, indexed, since, min_rank, rx, found)
+                    start = indexed
+                if start < st.st_size: self.scan(mm, start, st.st_size, since, min_rank, rx, found)
+        return list(found)
+    @staticmethod
+    def line_at(mm, offset):
+        # 与 scan 返回的 LogRecord.text 一致：去掉 alist ForceColors 写进文件的 ANSI 颜色
+        end = mm.find(b"\n", offset); line = mm[offset:end if end >= 0 else len(mm)].decode("utf-8", "replace").rstrip("\r")
+        return ANSI_RE.sub("", line) if "\x1b" in line else line
+    def scan(self, mm, start, end, since, min_rank, rx, found):
+        parser, clock, pos = LogParser(), LogClock(), start
+        while pos < end:
+            if rx:
+                hit = rx.search(mm, pos, end)
+                if not hit: return
+                pos = max(start, mm.rfind(b"\n", start, hit.start()) + 1)
+            nxt = mm.find(b"\n", pos, end); nxt = end if nxt < 0 else nxt
+            line = mm[pos:nxt].decode("utf-8", "replace").rstrip("\r"); pos = nxt + 1
+            if not line: continue
+            rec = parser.parse(line)
+            if LEVEL_RANK[rec.level] >= min_rank and clock(rec.time) >= since: found.append(rec.text)
+
+class Supervisor:
+    # 持有 alist 的 Popen 句柄：优雅终止 + 升级 kill、就绪检测、崩溃退避重启
+    # 回调统一经 dispatch 投递：GUI 下回到 Qt 主线程，守护进程下进入主循环队列
+    def __init__(self, sink, dispatch=run_inline):
+        self.sink, self.dispatch = sink, dispatch
+        self.on_ready = None     # on_ready(启动到就绪耗时秒)
+        self.app_path = ""; self.process = None; self.reader = None
+        self.generation = 0; self.wanted = False; self.is_ready = False
+        self.started_at = 0.0; self.backoff = RESTART_BACKOFF[0]
+
+    def is_running(self): return self.process is not None and self.process.poll() is None
+
+    def start(self, app_path=None):
+        if app_path: self.app_path = app_path
+        if not self.app_path or self.is_running(): return
+        self.generation += 1; self.wanted = True; self.is_ready = False; self.started_at = time.perf_counter()
+        self.process = subprocess.Popen([self.app_path, "server", "--force-bin-dir"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        cwd=os.path.dirname(self.app_path), text=True, bufsize=1, creationflags=NO_WINDOW)
+        self.reader = LogReader(self, self.process, self.generation); self.reader.start()
+
+    def stop(self, then=None):
+        # 终止与等待放在后台线程，完成后经 dispatch 执行 then；同时作废尚未触发的自动重启
+        self.wanted = False; self.generation += 1
+        targets = [self.process.pid] if self.is_running() else []
+        threading.Thread(target=self._terminate, args=(targets, then), daemon=True).start()
+
+    def restart(self): self.stop(then=self.start)
+
+    def find_external(self):
+        # 未由本程序拉起时，仅按完整可执行路径匹配，避免误杀其他 alist 实例
+        import psutil
+        if not self.app_path: return []
+        target = os.path.normcase(os.path.normpath(self.app_path)); found = []
+        for proc in psutil.process_iter(['exe']):
+            try:
+                if proc.info['exe'] and os.path.normcase(os.path.normpath(proc.info['exe'])) == target: found.append(proc.pid)
+            except: pass
+        return found
+
+    def _terminate(self, pids, then):
+        import psutil
+        try:
+            procs = [psutil.Process(pid) for pid in (pids or self.find_external())]
+            for p in procs: p.terminate()
+            _, alive = psutil.wait_procs(procs, timeout=STOP_GRACE)
+            for p in alive: p.kill()
+            psutil.wait_procs(alive, timeout=STOP_GRACE)
+        except psutil.NoSuchProcess: pass
+        except Exception as e: self.sink.append(f"❌ 停止失败: {e}")
+        if then: self.dispatch(then)
+
+    def mark_ready(self):
+        if self.wanted and not self.is_ready and self.is_running():
+            self.is_ready = True
+            if self.on_ready: self.on_ready(time.perf_counter() - self.started_at)
+
+    def _on_ready_seen(self, gen):
+        if gen == self.generation: self.mark_ready()
+
+    def _on_exited(self, gen, code, fatal=None):
+        if gen != self.generation or not self.wanted: return
+        self.wanted = False
+        if RESTART_POLICY == "never" or (RESTART_POLICY == "on-failure" and code == 0):
+            self.sink.append(f"⚠️ 服务已退出 (code {code})"); return
+        if fatal: self.sink.append(f"❌ 服务退出 (code {code})，不自动重启 ({fatal.event}): {fatal.message}"); return
+        if time.perf_counter() - self.started_at > RESTART_STABLE: self.backoff = RESTART_BACKOFF[0]
+        self.sink.append(f"⚠️ 服务异常退出 (code {code})，{self.backoff}s 后自动重启")
+        timer = threading.Timer(self.backoff, self.dispatch, (self._auto_restart, gen)); timer.daemon = True; timer.start()
+        self.backoff = min(self.backoff * 2, RESTART_BACKOFF[1])
+
+    def _auto_restart(self, gen):
+        if gen == self.generation and not self.is_running(): self.start()
+
+class BackupEngine:
+    # 增量去重备份仓库：chunks/ 存按 sha256 命名的压缩块，snapshots/ 存每次快照的文件清单
+    def __init__(self, data_dir, repo):
+        self.data_dir, self.repo = data_dir, repo
+        self.chunk_dir = os.path.join(repo, "chunks"); self.snap_dir = os.path.join(repo, "snapshots"); self.written = 0
+
+    def snapshots(self):
+        try: return sorted(n for n in os.listdir(self.snap_dir) if n.endswith(".json"))
+        except FileNotFoundError: return []
+
+    def load_snapshot(self, name):
+        with open(os.path.join(self.snap_dir, name), "r", encoding="utf-8") as f: return json.load(f)
+
+    def chunk_path(self, digest): return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def scan(self):
+        files = []
+        for root, dirs, names in os.walk(self.data_dir):
+            if root == self.data_dir: dirs[:] = [d for d in dirs if d not in BACKUP_EXCLUDE]
+            for n in names:
+                if n in BACKUP_EXCLUDE: continue
+                path = os.path.join(root, n); files.append((os.path.relpath(path, self.data_dir).replace(os.sep, "/"), path))
+        return files
+
+    def file_key(self, rel, path):
+        # size + mtime 未变则直接复用上一份快照的块列表，不再读取文件；data.db 还要看 WAL
+        st = os.stat(path); key = [st.st_size, st.st_mtime_ns]
+        if rel == "data.db" and os.path.exists(path + "-wal"):
+            wal = os.stat(path + "-wal"); key += [wal.st_size, wal.st_mtime_ns]
+        return key, st.st_size
+
+    def snapshot_db(self, path):
+        # SQLite 在线备份 API：得到一致的副本，无需停止 alist
+        import sqlite3
+        tmp = os.path.join(self.repo, "data.db.snapshot")
+        src = sqlite3.connect(path, timeout=10); dst = sqlite3.connect(tmp)
+        try: src.backup(dst)
+        finally: dst.close(); src.close()
+        return tmp
+
+    def store(self, f, advance):
+        chunks, whole, size = [], hashlib.sha256(), 0
+        while True:
+            data = f.read(BACKUP_CHUNK_SIZE)
+            if not data: break
+            digest = hashlib.sha256(data).hexdigest(); target = self.chunk_path(digest)
+            if not os.path.exists(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True); tmp = target + ".tmp"
+                with open(tmp, "wb") as out: out.write(zlib.compress(data, 1))
+                os.replace(tmp, target); self.written += 1
+            chunks.append(digest); whole.update(data); size += len(data); advance(len(data))
+        return {"size": size, "sha256": whole.hexdigest(), "chunks": chunks}
+
+    def restore(self, name, target, progress=lambda done, total: None):
+        # 按清单重组文件，逐块 + 整文件双重 sha256 校验
+        files = self.load_snapshot(name)["files"]; total = sum(e["size"] for e in files.values()); done = 0
+        for rel, entry in files.items():
+            path = os.path.join(target, *rel.split("/")); os.makedirs(os.path.dirname(path), exist_ok=True); whole = hashlib.sha256()
+            with open(path, "wb") as out:
+                for digest in entry["chunks"]:
+                    with open(self.chunk_path(digest), "rb") as f: data = zlib.decompress(f.read())
+                    if hashlib.sha256(data).hexdigest() != digest: raise ValueError(f"数据块损坏: {digest[:12]}")
+                    out.write(data); whole.update(data); done += len(data); progress(done, total)
+            if whole.hexdigest() != entry["sha256"]: raise ValueError(f"文件校验失败: {rel}")
+
+    def run(self, progress=lambda done, total: None):
+        os.makedirs(self.snap_dir, exist_ok=True); os.makedirs(self.chunk_dir, exist_ok=True)
+        prev = self.snapshots(); prev_files = self.load_snapshot(prev[-1])["files"] if prev else {}
+        plan, total, done = [], 0, [0]
+        for rel, path in self.scan():
+            try: key, size = self.file_key(rel, path)
+            except OSError: continue
+            old = prev_files.get(rel); reuse = old if old and old.get("key") == key else None
+            plan.append((rel, path, key, reuse))
+            if not reuse: total += size
+        def advance(n): done[0] += n; progress(done[0], total)
+        self.written, files = 0, {}
+        for rel, path, key, reuse in plan:
+            if reuse: files[rel] = reuse; continue
+            src = self.snapshot_db(path) if rel == "data.db" else path
+            try:
+                with open(src, "rb") as f: files[rel] = dict(self.store(f, advance), key=key)
+            except OSError: pass  # 扫描后被删除的临时文件
+            finally:
+                if src != path: os.remove(src)
+        name = time.strftime("%Y%m%d-%H%M%S") + ".json"; target = os.path.join(self.snap_dir, name)
+        with open(target + ".tmp", "w", encoding="utf-8") as f: json.dump({"created": time.time(), "files": files}, f)
+        os.replace(target + ".tmp", target)
+        return name, len(files), self.prune()
+
+    def prune(self):
+        names = self.snapshots(); keep = set(names[-BACKUP_KEEP_LAST:]); daily = {}
+        for n in names: daily[n[:8]] = n
+        keep.update(sorted(daily.values())[-BACKUP_KEEP_DAILY:])
+        for n in names:
+            if n not in keep: os.remove(os.path.join(self.snap_dir, n))
+        live = set()
+        for n in keep:
+            for entry in self.load_snapshot(n)["files"].values(): live.update(entry["chunks"])
+        removed = 0
+        for root, _, names in os.walk(self.chunk_dir):
+            for n in names:
+                if n not in live: os.remove(os.path.join(root, n)); removed += 1
+        return removed
+
+def stage_zip(path, target, progress=lambda done, total: None):
+    # 流式解压并逐项核对 CRC；兼容整目录 (data/ 前缀) 与仅 data 内容两种 zip
+    import zipfile
+    with zipfile.ZipFile(path) as z:
+        infos = [i for i in z.infolist() if not i.is_dir()]
+        prefix = "data/" if any(i.filename.startswith("data/") for i in infos) else ""
+        infos = [i for i in infos if i.filename.startswith(prefix)]
+        total, done, root = sum(i.file_size for i in infos), 0, os.path.realpath(target)
+        for info in infos:
+            dest = os.path.realpath(os.path.join(target, info.filename[len(prefix):]))
+            if not dest.startswith(root + os.sep): raise ValueError(f"非法路径: {info.filename}")
+            os.makedirs(os.path.dirname(dest), exist_ok=True); crc = 0
+            with z.open(info) as src, open(dest, "wb") as out:
+                while True:
+                    data = src.read(BACKUP_CHUNK_SIZE)
+                    if not data: break
+                    out.write(data); crc = zlib.crc32(data, crc); done += len(data); progress(done, total)
+            if crc != info.CRC: raise zipfile.BadZipFile(f"CRC 校验失败: {info.filename}")
+
+def stage_restore(source, staging, progress=lambda done, total: None):
+    # 全部写入暂存目录，线上 data 目录在此阶段不受影响
+    if os.path.exists(staging): shutil.rmtree(staging)
+    os.makedirs(staging)
+    if source.endswith(".json"): BackupEngine(None, os.path.dirname(os.path.dirname(source))).restore(os.path.basename(source), staging, progress)
+    else: stage_zip(source, staging, progress)
+    check_data_dir(staging)
+
+def check_data_dir(path):
+    # 确认是一份可用的 alist 数据目录，否则随便一个 zip 都能"通过校验"，切换后 alist 以空库启动、原数据被当作回滚目录删掉
+    # 须有 config.json；使用 sqlite 时 data.db 须通过 quick_check 且含管理员账号。恢复前校验暂存目录，恢复后再校验一次线上目录
+    try:
+        with open(os.path.join(path, "config.json"), "r", encoding="utf-8") as f: conf = json.load(f)
+    except (OSError, ValueError) as e: raise ValueError(f"缺少有效的 config.json: {e}")
+    database = conf.get("database") or {}
+    if (database.get("type") or "sqlite3") != "sqlite3": return   # MySQL / PostgreSQL 的数据不在 data 目录里
+    db = os.path.join(path, "data.db")
+    if not os.path.isfile(db): raise ValueError("缺少 data.db")
+    import sqlite3
+    try:
+        conn = sqlite3.connect(f"file:{db}?mode=ro", uri=True, timeout=2)
+        try:
+            result = conn.execute("PRAGMA quick_check").fetchone()[0]
+            admin = result == "ok" and conn.execute(f"SELECT 1 FROM {database.get('table_prefix') or 'x_'}users WHERE role = ? LIMIT 1", (ADMIN_ROLE,)).fetchone()
+        finally: conn.close()
+    except sqlite3.Error as e: raise ValueError(f"data.db 无法读取: {e}")
+    if result != "ok": raise ValueError(f"data.db 校验失败: {result}")
+    if not admin: raise ValueError("data.db 中没有管理员账号")
+
+def swap_in(data_dir, staging):
+    # data → data.rollback，暂存目录 → data；任一步失败都恢复原状并抛出
+    rollback = data_dir + ".rollback"
+    try:
+        if os.path.exists(rollback): shutil.rmtree(rollback)
+        if os.path.exists(data_dir): os.rename(data_dir, rollback)
+        os.rename(staging, data_dir)
+    except OSError:
+        if not os.path.exists(data_dir) and os.path.exists(rollback): os.rename(rollback, data_dir)
+        shutil.rmtree(staging, ignore_errors=True); raise
+    return rollback
+
+def roll_back(data_dir, rollback):
+    # 恢复后未通过健康检查：当前 data → data.failed，data.rollback → data；返回失败数据所在目录
+    failed = data_dir + ".failed"
+    if os.path.exists(failed): shutil.rmtree(failed)
+    if os.path.exists(data_dir): os.rename(data_dir, failed)
+    os.rename(rollback, data_dir); return failed
+
+_http = None
+def http_session():
+    # 进程内共用一个连接池，远程资源请求复用 keep-alive 连接
+    global _http
+    if _http is None:
+        import requests
+        _http = requests.Session(); _http.headers["User-Agent"] = "Mozilla/5.0"
+    return _http
+
+class AssetCache:
+    # 远程资源的磁盘缓存：<sha1>.bin 存内容，<sha1>.json 存抓取时间与 ETag / Last-Modified
+    def __init__(self, root=None): self.root = root or os.path.join(BASE_DIR, ASSET_CACHE_DIR)
+    def paths(self, url):
+        base = os.path.join(self.root, hashlib.sha1(url.encode("utf-8")).hexdigest())
+        return base + ".bin", base + ".json"
+    def load(self, url):
+        body, meta = self.paths(url)
+        try:
+            with open(meta, "r", encoding="utf-8") as f: info = json.load(f)
+            with open(body, "rb") as f: return f.read(), info
+        except (OSError, ValueError): return None, {}
+    def store(self, url, data, info):
+        body, meta = self.paths(url)
+        try:
+            if not os.path.isdir(self.root): os.makedirs(self.root); hide_file(self.root)
+            with open(body + ".tmp", "wb") as f: f.write(data)
+            os.replace(body + ".tmp", body)
+            with open(meta + ".tmp", "w", encoding="utf-8") as f: json.dump(info, f)
+            os.replace(meta + ".tmp", meta)
+        except OSError: pass
+    def fetch(self, url, ttl=ASSET_TTL, headers=None, offline=False):
+        # 新鲜期内只读磁盘；过期后条件请求，304 只刷新时间戳；离线或请求失败时退回旧副本
+        data, info = self.load(url)
+        if offline or data is not None and time.time() - info.get("fetched", 0) < ttl: return data
+        cond = dict(headers or {})
+        if data is not None and info.get("etag"): cond["If-None-Match"] = info["etag"]
+        if data is not None and info.get("last_modified"): cond["If-Modified-Since"] = info["last_modified"]
+        try:
+            resp = http_session().get(url, headers=cond, timeout=ASSET_TIMEOUT)
+            if resp.status_code == 304 and data is not None: info["fetched"] = time.time()
+            elif resp.status_code == 200:
+                data = resp.content
+                info = {"url": url, "fetched": time.time(), "etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+            else: return data
+        except Exception: return data
+        self.store(url, data, info); return data
+
+class StartupProfile:
+    # 记录启动各阶段耗时 (ms)，用于发现首个窗口出现时间的回退
+    def __init__(self, t0=None): self.t0 = self.last = t0 or time.perf_counter(); self.phases = []
+    def mark(self, phase):
+        now = time.perf_counter(); self.phases.append((phase, (now - self.last) * 1000)); self.last = now
+    def report(self):
+        lines = [f"⏱ {name:<12} {ms:8.1f} ms" for name, ms in self.phases]
+        return lines + [f"⏱ {'total':<12} {(self.last - self.t0) * 1000:8.1f} ms"]
+
+class AdminAuthError(RuntimeError):
+    # token 缺失 / 过期 (alist 返回 code 401)，重新登录即可
+    pass
+
+class AdminClient:
+    # 通过运行中的 alist HTTP API 读取 / 修改凭证、列出存储，token 只缓存在内存中
+    def __init__(self, port=DEFAULT_PORT):
+        self.base = f"http://127.0.0.1:{port}"; self._session = None; self.token = None; self.username = None
+        self.rejected = None     # 最近一次被服务端拒绝的 (用户名, 密码)
+
+    @property
+    def session(self):
+        if self._session is None:
+            import requests
+            # 存储探测会在线程池里并发复用这个会话：连接池与并发上限一致，全部走 keep-alive
+            self._session = requests.Session()
+            self._session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=STORAGE_PROBE_WORKERS))
+        return self._session
+
+    def call(self, method, path, timeout=ADMIN_API_TIMEOUT, **kw):
+        headers = {"Authorization": self.token} if self.token else {}
+        resp = self.session.request(method, self.base + path, headers=headers, timeout=timeout, **kw).json()
+        if resp.get("code") == 401: raise AdminAuthError(resp.get("message") or "unauthorized")
+        if resp.get("code") != 200: raise RuntimeError(resp.get("message") or f"code {resp.get('code')}")
+        return resp.get("data")
+
+    def login(self, username, password):
+        # 服务端明确拒绝 (非 200) 时记下这组凭证；网络错误不算，下次照常重试
+        self.token = None
+        try: self.token = self.call("POST", "/api/auth/login", json={"username": username, "password": password})["token"]
+        except RuntimeError: self.rejected = (username, password); raise
+        self.username = username; self.rejected = None
+
+    def me(self): return self.call("GET", "/api/me")
+
+    def set_password(self, password):
+        # 改密后旧 token 随即失效，用新密码重新登录刷新缓存
+        me = self.me(); self.call("POST", "/api/me/update", json={"username": me["username"], "password": password, "sso_id": me.get("sso_id", "")})
+        self.login(me["username"], password)
+
+    def storages(self): return self.call("GET", "/api/admin/storage/list", params={"page": 1, "per_page": 1000}).get("content") or []
+
+    def list_dir(self, path, timeout=STORAGE_PROBE_TIMEOUT, refresh=False):
+        return self.call("POST", "/api/fs/list", timeout=timeout, json={"path": path, "page": 1, "per_page": 1, "refresh": refresh})
+
+class StorageStats:
+    # 单个挂载点最近 STORAGE_WINDOW 次探测的延迟分布与成败
+    def __init__(self, driver=""):
+        self.driver = driver; self.histogram = LatencyHistogram(STORAGE_WINDOW, STORAGE_LATENCY_BUCKETS)
+        self.results = deque(maxlen=STORAGE_WINDOW); self.last_error = ""; self.refreshed = time.monotonic()
+    def due_refresh(self):
+        # 到了强制回源的时候返回 True 并记下时间
+        if not STORAGE_PROBE_REFRESH or time.monotonic() - self.refreshed < STORAGE_PROBE_REFRESH: return False
+        self.refreshed = time.monotonic(); return True
+    def add(self, ms, error=None):
+        if ms is not None: self.histogram.add(ms)
+        self.results.append(error is None)
+        if error: self.last_error = error
+    def error_rate(self): return self.results.count(False) / len(self.results) if self.results else 0.0
+    def row(self, mount):
+        # 交给界面 / CLI 的快照，避免跨线程读活对象
+        lat = self.histogram
+        return {"mount": mount, "driver": self.driver, "samples": len(self.results), "p50": lat.percentile(0.5), "p95": lat.percentile(0.95),
+                "summary": f"p50 {lat.fmt(0.5)} · p95 {lat.fmt(0.95)}" if lat.samples else "p50 -- · p95 --",
+                "error_rate": self.error_rate(), "last_error": self.last_error if self.results and not self.results[-1] else ""}
+
+class StorageProber(threading.Thread):
+    # 经 admin API 列出各实例已挂载的存储，在有界线程池上并发 fs/list：一轮耗时约等于最慢的单个存储，而不是总和
+    # 需要管理员 token (Instance.ensure_admin_token)；拿不到时该实例跳过，on_stats 收到 None
+    def __init__(self, dispatch=run_inline):
+        super().__init__(daemon=True); self.dispatch = dispatch
+        self.on_stats = None     # on_stats(实例名, [StorageStats.row, ...] 或 None)
+        self.targets = []; self.stats = {}; self.mounts = {}; self.lock = threading.Lock()
+        self._wake = threading.Event(); self._halt = threading.Event()
+    def set_targets(self, instances):
+        with self.lock:
+            self.targets = list(instances); names = {i.name for i in instances}
+            for name in list(self.stats):
+                if name not in names: del self.stats[name]; self.mounts.pop(name, None)
+        self._wake.set()
+    def poke(self): self._wake.set()
+    def list_storages(self, inst):
+        cached = self.mounts.get(inst.name)
+        if cached and time.monotonic() - cached[0] < STORAGE_LIST_TTL: return cached[1]
+        found = [s for s in inst.admin.storages() if not s.get("disabled")]
+        self.mounts[inst.name] = (time.monotonic(), found); return found
+    @staticmethod
+    def probe_one(inst, storage, refresh=False):
+        status = storage.get("status") or "work"
+        if status != "work": return None, status   # alist 自己已判定该存储初始化失败
+        start = time.perf_counter()
+        try: inst.admin.list_dir(storage["mount_path"], refresh=refresh); return (time.perf_counter() - start) * 1000, None
+        except AdminAuthError: raise
+        except Exception as e: return (time.perf_counter() - start) * 1000, str(e)[:200]
+    def probe_round(self, pool):
+        from concurrent.futures import as_completed
+        with self.lock: targets = [i for i in self.targets if i.state != "stopped" and i.path]
+        jobs, rows = {}, {}
+        for inst in targets:
+            try:
+                if not inst.ensure_admin_token(): rows[inst.name] = None; continue
+                storages = self.list_storages(inst)
+            except Exception: inst.admin.token = None; rows[inst.name] = None; continue
+            with self.lock:
+                old = self.stats.get(inst.name, {})
+                current = self.stats[inst.name] = {s["mount_path"]: old.get(s["mount_path"]) or StorageStats(s.get("driver", "")) for s in storages}
+                refresh = {m: st.due_refresh() for m, st in current.items()}
+            for s in storages: jobs[pool.submit(self.probe_one, inst, s, refresh[s["mount_path"]])] = (inst, s["mount_path"])
+            rows[inst.name] = []
+        for job in as_completed(jobs):
+            inst, mount = jobs[job]
+            try: ms, error = job.result()
+            except AdminAuthError: inst.admin.token = None; continue   # token 过期：本轮样本作废，下轮重新登录
+            with self.lock: stats = self.stats.get(inst.name, {}).get(mount)
+            if stats: stats.add(ms, error)
+        with self.lock:
+            for name in rows:
+                if rows[name] is not None: rows[name] = [st.row(m) for m, st in sorted(self.stats.get(name, {}).items())]
+        return rows
+    def run(self):
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(STORAGE_PROBE_WORKERS, thread_name_prefix="storage-probe") as pool:
+            while not self._halt.is_set():
+                self._wake.clear()
+                for name, rows in self.probe_round(pool).items():
+                    if self.on_stats: self.dispatch(self.on_stats, name, rows)
+                self._wake.wait(STORAGE_PROBE_INTERVAL)
+    def stop(self):
+        # 进行中的 fs/list 最长要等 STORAGE_PROBE_TIMEOUT，退出时不等它
+        self._halt.set(); self._wake.set()
+        if self.is_alive(): self.join(PROBE_TIMEOUT)
+
+def read_admin_from_db(db):
+    # 只读打开 data.db 取管理员账号；新版 alist 仅存哈希，此时密码为空
+    import sqlite3
+    try:
+        conn = sqlite3.connect(f"file:{db}?mode=ro", uri=True, timeout=2)
+        try: row = conn.execute("SELECT username, password FROM x_users WHERE role = ? ORDER BY id LIMIT 1", (ADMIN_ROLE,)).fetchone()
+        finally: conn.close()
+        return row or (None, None)
+    except sqlite3.Error: return None, None
+
+def read_port(data_dir):
+    # alist v3 的端口在 data/config.json 的 scheme.http_port，旧版为顶层 port
+    try:
+        with open(os.path.join(data_dir, "config.json"), "r", encoding="utf-8") as f: conf = json.load(f)
+        port = int(conf.get("scheme", {}).get("http_port") or conf.get("port") or 0)
+        return port if port > 0 else None
+    except: return None
+
+class Instance:
+    # 一个 alist 安装：路径、端口、数据目录、日志流、监管器与凭证各自独立
+    def __init__(self, name, path, port=None, dispatch=run_inline):
+        self.name = name; self.path = os.path.normpath(path) if path else ""
+        self.port = port or read_port(self.data_dir) or DEFAULT_PORT
+        self.log_buffer = LogBuffer(); self.supervisor = Supervisor(self.log_buffer, dispatch); self.supervisor.app_path = self.path; self.tailer = None
+        self.admin = AdminClient(self.port); self.raw_username, self.raw_password = "admin", ""
+        self.state, self.latency = "stopped", "⏱ 延迟: --"
+    @property
+    def data_dir(self): return os.path.join(os.path.dirname(self.path), "data") if self.path else ""
+    def set_path(self, path):
+        self.path = os.path.normpath(path); self.supervisor.app_path = self.path
+        if self.tailer: self.follow_log()
+    @property
+    def log_path(self): return read_log_path(self.path)
+    def follow_log(self):
+        # 跟随 alist 自己的日志文件并持续建索引；由本程序拉起时日志已经走 stdout，文件内容只建索引不推送
+        self.unfollow_log(); path = self.log_path
+        if path: self.tailer = LogTailer(path, self.log_buffer, live=lambda: not self.supervisor.is_running()); self.tailer.start()
+    def unfollow_log(self):
+        if self.tailer: self.tailer.stop(); self.tailer = None
+    def to_json(self): return {"name": self.name, "path": self.path, "port": self.port}
+    def ensure_admin_token(self):
+        # 已有 token 直接用；否则用数据库里的明文密码 (旧版) 或日志抓到的初始密码登录
+        # 被拒绝过的凭证 (多半已在网页里改过密码) 不再重试：alist 会封禁连续登录失败的 IP，连带挡住本机网页登录
+        if self.admin.token: return self.admin.username
+        user, pwd = read_admin_from_db(os.path.join(self.data_dir, "data.db"))
+        user, pwd = user or self.raw_username, pwd or self.raw_password
+        if not pwd or (user, pwd) == self.admin.rejected: return None
+        self.admin.login(user, pwd); return user
+
+# --- 本地配置 (均为程序目录下的隐藏文件) ---
+def auto_find_path():
+    for name in ALIST_NAMES:
+        local_alist = os.path.join(BASE_DIR, name)
+        if os.path.isfile(local_alist): return os.path.normpath(local_alist)
+    if os.path.exists(CONFIG_FILE):
+        try:
+            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+                p = f.read().strip().replace('"', '')
+                if os.path.isfile(p): return os.path.normpath(p)
+        except: pass
+    return ""
+
+def load_instances(dispatch=run_inline):
+    try:
+        with open(INSTANCES_FILE, "r", encoding="utf-8") as f:
+            found = [Instance(e["name"], e.get("path", ""), e.get("port"), dispatch) for e in json.load(f)]
+        if found: return found
+    except: pass
+    return [Instance("alist", auto_find_path(), dispatch=dispatch)]
+
+def save_instances(instances):
+    try:
+        with open(INSTANCES_FILE, "w", encoding="utf-8") as f: json.dump([i.to_json() for i in instances], f, ensure_ascii=False)
+        hide_file(INSTANCES_FILE)
+    except: pass
+
+def load_backup_repo():
+    if os.path.exists(BACKUP_REPO_FILE):
+        try:
+            with open(BACKUP_REPO_FILE, "r", encoding="utf-8") as f:
+                p = f.read().strip()
+                if os.path.isdir(p): return p
+        except: pass
+    return ""
+
+def save_backup_repo(repo):
+    try:
+        with open(BACKUP_REPO_FILE, "w", encoding="utf-8") as f: f.write(repo)
+        hide_file(BACKUP_REPO_FILE)
+    except: pass